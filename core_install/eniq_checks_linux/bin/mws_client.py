@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+MWS connection layer shared by the MWS prechecks
+"""
+# ********************************************************************
+# Ericsson Radio Systems AB                                     SCRIPT
+# ********************************************************************
+#
+#
+# (c) Ericsson Radio Systems AB 2019 - All rights reserved.
+#
+# The copyright to the computer program(s) herein is the property
+# of Ericsson Radio Systems AB, Sweden. The programs may be used
+# and/or copied only with the written permission from Ericsson Radio
+# Systems AB or in accordance with the terms and conditions stipulated
+# in the agreement/contract under which the program(s) have been
+# supplied.
+#
+# ********************************************************************
+# Name      : mws_client.py
+# Purpose   : Used by mws_hardware_check.py and mws_upgrade_check.py to
+#             decrypt the MWS password once per precheck run, probe the
+#             MWS server and run commands over one cached ssh connection
+#             per host and user.
+# *********************************************************************
+"""
+Modules used in the script
+"""
+import atexit
+import base64
+import fcntl
+import hashlib
+import json
+import os
+import socket
+import subprocess
+import paramiko
+try:
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+except ImportError:
+    Cipher = None
+
+"""
+Global variables used within the script
+"""
+SSH_PORT = 22
+PROBE_TIMEOUT = 5
+CONNECTIONS = {}
+PASSWORD_FILE = "mws_password"
+
+def derive_key_iv(pass_phrase, salt):
+    """
+    Derives the aes-256 key and iv the way
+    openssl enc does with -md sha512
+    Param:
+          pass_phrase -> pass phrase as bytes
+          salt -> 8 bytes salt
+    return: (key, iv)
+    """
+    data = b""
+    block = b""
+    while len(data) < 48:
+        block = hashlib.sha512(block + pass_phrase + salt).digest()
+        data += block
+    return data[:32], data[32:48]
+
+def decrypt_password(encrypted, pass_phrase):
+    """
+    Decrypts a password encrypted with
+    openssl enc -aes-256-ctr -md sha512 -a -salt
+    Param:
+          encrypted -> base64 encrypted password
+          pass_phrase -> strong pass phrase
+    return: decrypted password
+    """
+    if Cipher is None:
+        proc = subprocess.Popen(["openssl", "enc", "-aes-256-ctr", "-md", "sha512", "-a", "-d", "-salt",
+                                 "-pass", "pass:{}".format(pass_phrase)],
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        out = proc.communicate((encrypted.strip() + "\n").encode("utf-8"))[0]
+        return out.decode("utf-8").strip()
+    raw = base64.b64decode("".join(encrypted.split()))
+    if raw[:8] != b"Salted__":
+        return ""
+    key, iv = derive_key_iv(pass_phrase.encode("utf-8"), raw[8:16])
+    decryptor = Cipher(algorithms.AES(key), modes.CTR(iv), backend=default_backend()).decryptor()
+    out = decryptor.update(raw[16:]) + decryptor.finalize()
+    return out.decode("utf-8").strip()
+
+def shared_password(encrypted, pass_phrase):
+    """
+    Returns the decrypted MWS password of this precheck run. The
+    first caller decrypts it into the facts directory, readable by
+    root only, the others wait on the lock and reuse it
+    Param:
+          encrypted -> base64 encrypted password
+          pass_phrase -> strong pass phrase
+    return: decrypted password
+    """
+    facts_dir = os.environ.get("PRECHECK_FACTS_DIR", "")
+    if not facts_dir or not os.path.isdir(facts_dir):
+        return decrypt_password(encrypted, pass_phrase)
+    password_file = os.path.join(facts_dir, PASSWORD_FILE)
+    lock = open(password_file + ".lock", "a")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if os.path.exists(password_file):
+            with open(password_file) as f:
+                fact = json.load(f)
+            if fact["encrypted"] == encrypted:
+                return fact["password"]
+        password = decrypt_password(encrypted, pass_phrase)
+        fd = os.open(password_file + ".tmp", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump({"encrypted": encrypted, "password": password}, f)
+        os.rename(password_file + ".tmp", password_file)
+    finally:
+        lock.close()
+    return password
+
+def probe(host, port=SSH_PORT, timeout=PROBE_TIMEOUT):
+    """
+    Checks that the ssh port of the host accepts
+    connections, over IPv4 or IPv6
+    Param:
+          host -> MWS hostname or ip
+    return: True if reachable
+    """
+    try:
+        sock = socket.create_connection((host, port), timeout)
+        sock.close()
+        return True
+    except Exception:
+        return False
+
+def get_client(host, uname, password, look_for_keys=True):
+    """
+    Returns the cached ssh connection for host
+    and user, connecting on the first call
+    Param:
+          host -> MWS hostname or ip
+          uname -> MWS user
+          password -> decrypted password
+          look_for_keys -> also try the local ssh keys when connecting
+    return: paramiko SSHClient, raises an exception on failure
+    """
+    client = CONNECTIONS.get((host, uname))
+    if client is not None:
+        transport = client.get_transport()
+        if transport is not None and transport.is_active():
+            return client
+        client.close()
+    client = paramiko.SSHClient()
+    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    client.connect(host, SSH_PORT, username=uname, password=password, look_for_keys=look_for_keys)
+    CONNECTIONS[(host, uname)] = client
+    return client
+
+def run_command(host, uname, password, cmd, look_for_keys=True):
+    """
+    Runs a command over the cached connection
+    Param:
+          host -> MWS hostname or ip
+          uname -> MWS user
+          password -> decrypted password
+          cmd -> command to execute
+          look_for_keys -> also try the local ssh keys when connecting
+    return: (stdout, stderr) as strings
+    """
+    client = get_client(host, uname, password, look_for_keys)
+    stdin, stdout, stderr = client.exec_command(cmd)
+    out = stdout.read()
+    err = stderr.read()
+    if not isinstance(out, str):
+        out = out.decode("utf-8", "replace")
+        err = err.decode("utf-8", "replace")
+    return out, err
+
+def close_all():
+    """
+    Closes all the cached connections
+    Param: None
+    return: None
+    """
+    for client in CONNECTIONS.values():
+        client.close()
+    CONNECTIONS.clear()
+
+atexit.register(close_all)
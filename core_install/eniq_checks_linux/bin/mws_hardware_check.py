@@ -32,17 +32,12 @@ Script for MWS Hardware check
 """
 Modules used in the script
 """
-import subprocess
 import os
 import signal
 import sys
 import logging
 from os import path
-import time
-import re
-import base64
-import getpass
-import paramiko
+import mws_client
 
 """
 Global variables used within the script
@@ -134,15 +129,10 @@ class autoprecheck(object):
                 return code
             self.log_file_scrn("Collecting MWS hardware type", 1)
             cmd = "dmidecode -t system | grep -w 'Product Name' | cut -d ':' -f2 | cut -d ' ' -f4,5"
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            ssh.connect(self.mws_host, 22, self.uname, self.password, look_for_keys=False)
-            stdin, stdout, stderr = ssh.exec_command(cmd)
-            val = stderr.read().strip()
-            if val:
+            outlines, val = mws_client.run_command(self.mws_host, self.uname, self.password, cmd, look_for_keys=False)
+            if val.strip():
                 self.log_file_scrn("Command execution issue for hardware type check", 1)
                 error_code = 148
-            outlines = stdout.read()
             data = outlines.strip("\n")
             self.log_file_scrn("Existing Hardware: {}".format(data), 1)
             if "Gen8" in outlines:
@@ -173,18 +163,12 @@ class autoprecheck(object):
             self.log_file_scrn(MSG1, 1)
             error_code = 147
         if error_code == 0:
-            try:
-                if not subprocess.check_output(["ping", self.mws_host, "-c", "1"]):
-                    subprocess.check_output(["ping6", self.mws_host, "-c", "1"])
-            except Exception:
+            if not mws_client.probe(self.mws_host):
                 self.log_file_scrn(MSG, 1)
                 error_code = 146
         if error_code == 0:
             try:
-                client = paramiko.SSHClient()
-                client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                client.connect(self.mws_host,22, username=self.uname, password=self.password)
-                client.close()
+                mws_client.get_client(self.mws_host, self.uname, self.password)
             except Exception:
                 self.log_file_scrn(MSG, 1)
                 error_code = 146
@@ -239,9 +223,7 @@ class autoprecheck(object):
         if os.path.exists(PASS_PHRASE_PATH):
             file1 = open(PASS_PHRASE_PATH, "r")
             pass_phrase = file1.read().strip()
-            dec = "echo \"{}\" | openssl enc -aes-256-ctr -md sha512 -a -d -salt -pass pass:{}".format(
-                self.pwd, pass_phrase)
-            pssword = os.popen(dec).read().strip()
+            pssword = mws_client.shared_password(self.pwd, pass_phrase)
             file1.close()
             return pssword
         else:
@@ -30,7 +30,8 @@ Script to MWS upgrade check for ENIQ
 """
 Modules used in the script
 """
-import subprocess,os,signal,sys,paramiko,getpass,base64,re,time,logging,base64
+import os,signal,sys,logging
+import mws_client
 from os import path
 
 """
@@ -132,18 +133,12 @@ class upgrade_check(object):
             self.log_file_scrn(MSG1, 1)
             error_code = 147
         if error_code == 0:
-            try:
-                if not subprocess.check_output(["ping", self.mws_host, "-c", "1"]):
-                    subprocess.check_output(["ping6", self.mws_host, "-c", "1"])
-            except Exception:
+            if not mws_client.probe(self.mws_host):
                 self.log_file_scrn(MSG, 1)
                 error_code = 146
         if error_code == 0:
             try:
-                client = paramiko.SSHClient()
-                client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                client.connect(self.mws_host,22, username=self.uname, password=self.pwd)
-                client.close()
+                mws_client.get_client(self.mws_host, self.uname, self.pwd)
             except Exception:
                 self.log_file_scrn(MSG, 1)
                 error_code = 146
@@ -198,9 +193,7 @@ class upgrade_check(object):
         if os.path.exists(PASS_PHRASE_PATH):
             file1 = open(PASS_PHRASE_PATH, "r")
             pass_phrase = file1.read().strip()
-            dec = "echo \"{}\" | openssl enc -aes-256-ctr -md sha512 -a -d -salt -pass pass:{}".format(
-                self.str_pwd, pass_phrase)
-            pssword = os.popen(dec).read().strip()
+            pssword = mws_client.shared_password(self.str_pwd, pass_phrase)
             file1.close()
             return pssword
         else:
@@ -216,12 +209,8 @@ class upgrade_check(object):
             error_code=code
         try:
             self.log_file_scrn("Collecting current sprint value",1)
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            ssh.connect(self.mws_host, 22, self.uname, self.pwd)
-            stdin, stdout, stderr = ssh.exec_command("cat /ericsson/config/mws_status")
-            out = stdout.read().split("\n")
-            va = stderr.read()
+            out, va = mws_client.run_command(self.mws_host, self.uname, self.pwd, "cat {}".format(MWS))
+            out = out.split("\n")
             va = va.strip()
             no = 0
             if va == True:
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+NAS facts shared by the NAS prechecks
+"""
+# ********************************************************************
+#
+#
+# (c) Ericsson Radio Systems AB 2019 - All rights reserved.
+#
+# The copyright to the computer program(s) herein is the property
+# of Ericsson Radio Systems AB, Sweden. The programs may be used
+# and/or copied only with the written permission from Ericsson Radio
+# Systems AB or in accordance with the terms and conditions stipulated
+# in the agreement/contract under which the program(s) have been
+# supplied.
+#
+# ********************************************************************
+# Name      : nas_facts.py
+# Purpose   : Collects the NAS console facts used by nas_hardware_check.py,
+#             nas_media_check.py and nas_rhel_check.py in one ssh session.
+#             The facts are kept in PRECHECK_FACTS_DIR for the precheck run.
+# Status Values:
+#  0  :: SUCCESS
+#  146::FAILURE::Server not reachable or invalid credentials
+#  148::FAILURE::Command execution failed
+# ********************************************************************
+"""
+Modules used in the script
+"""
+import fcntl
+import json
+import os
+import re
+import socket
+import subprocess
+"""
+Global variables used within the script
+"""
+NAS_CONSOLE = "support@nasconsole"
+NAS_USER = "storadm"
+FACT_COMMANDS = [("system", "dmidecode -t system"),
+                 ("banner", "cat /opt/VRTSnas/conf/banner"),
+                 ("release", "cat /etc/redhat-release")]
+FACT_MARKER = "#NAS_FACT#"
+FACTS_FILE = "nas_facts"
+DEPLOYMENT_FILE = "deployment_type"
+"""
+Class Started
+"""
+class nasfacts(object):
+    """
+    This class will collect the NAS console facts once per precheck run
+    """
+    def __init__(self):
+        """
+        Function to initialise the
+        class object variables
+        param: None
+        return: None
+        """
+        self.facts_dir = os.environ.get("PRECHECK_FACTS_DIR", "")
+        self.facts = None
+
+    def remote_command(self):
+        """
+        Builds the command run on the NAS console. Every command
+        is followed by a marker carrying its name and exit status
+        param: None
+        return: command string
+        """
+        cmds = []
+        for name, cmd in FACT_COMMANDS:
+            cmds.append('{0}; echo "{1} {2} $?"'.format(cmd, FACT_MARKER, name))
+        return "; ".join(cmds)
+
+    def parse_output(self, output):
+        """
+        Splits the session output into the output and exit
+        status of every command
+        param: output -> stdout of the ssh session
+        return: (outputs, return codes) dictionaries
+        """
+        outputs = {}
+        codes = {}
+        parts = re.split(FACT_MARKER + r" (\w+) (\d+)\n?", output)
+        for i in range(1, len(parts) - 1, 3):
+            outputs[parts[i]] = parts[i - 1]
+            codes[parts[i]] = int(parts[i + 1])
+        return outputs, codes
+
+    def collect(self):
+        """
+        Resolves the NAS console and runs all the fact commands
+        in a single ssh session
+        param: None
+        return: facts dictionary
+        """
+        facts = {"status": 0, "output": {}, "rc": {}}
+        host = NAS_CONSOLE.replace("support@", "")
+        try:
+            socket.gethostbyaddr(host)
+        except socket.herror:
+            facts["status"] = 146
+            return facts
+        except Exception:
+            facts["status"] = 148
+            return facts
+        ssh = "ssh -o StrictHostKeyChecking=no -n {0} '{1}'".format(NAS_CONSOLE, self.remote_command())
+        ssh_rc = 0
+        try:
+            output = subprocess.check_output(["su", "-c", ssh, NAS_USER])
+        except subprocess.CalledProcessError as err:
+            output = err.output
+            ssh_rc = err.returncode
+        except Exception:
+            facts["status"] = 148
+            return facts
+        if not isinstance(output, str):
+            output = output.decode("utf-8", "replace")
+        facts["output"], facts["rc"] = self.parse_output(output)
+        if not facts["rc"]:
+            # ssh exits with 255 when the passwordless connection is not working
+            facts["status"] = 146 if ssh_rc == 255 else 148
+        return facts
+
+    def get_facts(self):
+        """
+        Returns the facts of this precheck run. The first caller
+        collects them, the others wait on the lock and reuse them
+        param: None
+        return: facts dictionary
+        """
+        if self.facts is not None:
+            return self.facts
+        if not self.facts_dir or not os.path.isdir(self.facts_dir):
+            self.facts = self.collect()
+            return self.facts
+        facts_file = os.path.join(self.facts_dir, FACTS_FILE)
+        lock = open(facts_file + ".lock", "a")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if os.path.exists(facts_file):
+                with open(facts_file) as f:
+                    self.facts = json.load(f)
+            else:
+                self.facts = self.collect()
+                with open(facts_file + ".tmp", "w") as f:
+                    json.dump(self.facts, f)
+                os.rename(facts_file + ".tmp", facts_file)
+        finally:
+            lock.close()
+        return self.facts
+
+    def fact(self, name):
+        """
+        Returns the output of one fact command
+        param: name -> system, banner or release
+        return: (status, output) where status is 0, 146 or 148
+        """
+        facts = self.get_facts()
+        if facts["status"] != 0:
+            return facts["status"], ""
+        if facts["rc"].get(name) != 0:
+            return 148, ""
+        return 0, facts["output"][name]
+
+def deployment_type():
+    """
+    Returns the chassis type of this server, as collected by
+    eniq_checks.bsh for the run or from dmidecode
+    Param: None
+    return: chassis type, raises an exception on failure
+    """
+    facts_dir = os.environ.get("PRECHECK_FACTS_DIR", "")
+    deployment_file = os.path.join(facts_dir, DEPLOYMENT_FILE)
+    if facts_dir and os.path.exists(deployment_file):
+        with open(deployment_file) as f:
+            return f.read().strip()
+    output = subprocess.check_output(["dmidecode", "-t", "chassis"])
+    if not isinstance(output, str):
+        output = output.decode("utf-8", "replace")
+    for line in output.splitlines():
+        if line.strip().startswith("Type:"):
+            return line.split(":", 1)[1].strip()
+    raise ValueError("Chassis type not found")
@@ -32,8 +32,7 @@ import signal
 import sys
 import logging
 import os
-import socket
-import subprocess
+import nas_facts
 """
 Global variables used within the script
 """
@@ -59,17 +58,13 @@ class precheckhardware(object):
             sys.exit(0)
         self.logger = logging.getLogger()
         self.logging_configs()
-        self.h2=""
-        self.h4=""
-        self.out2=""
+        self.facts = nas_facts.nasfacts()
     def check_hardware_type(self):
         """
         This function will check hardware type
         """
         try:
-            t = ['dmidecode','-t','chassis','|','grep -w "Type"']
-            t1 = subprocess.check_output(t)
-            if 'Blade' in t1:
+            if 'Blade' in nas_facts.deployment_type():
                 self.log_file_hardware("Current deployment type is Blade", 1)
                 return 0
             else:
@@ -135,50 +130,29 @@ class precheckhardware(object):
         code3=self.check_hardware_type()
         if code3!=0:
             return code3
-        try:
-            self.log_file_hardware("Collecting details for NAS hardware type", 1)
-            out1 = ["su", "-c", "ssh -o StrictHostKeyChecking=no -n support@nasconsole 'ls'", "storadm"]
-            h = out1[2].split()
-            h1 = h[4]
-            self.h2 = h1.replace(" 'ls'", "")
-            h3 = self.h2.replace("support@", "")
-            try:
-                if socket.gethostbyaddr(h3):
-                    d="ssh -o StrictHostKeyChecking=no -n support@nasconsole 'dmidecode -t system'"
-                    self.out2 = ["su", "-c",d, "storadm"]
-                    self.h4 = self.out2[2].split()
-                    out5=self.hardware_check_type()
-                    return out5
-            except socket.herror:
-                self.log_file_hardware("Server not reachable", 1)
-                return 146
-        except Exception:
+        self.log_file_hardware("Collecting details for NAS hardware type", 1)
+        code4, hard = self.facts.fact("system")
+        if code4 == 146:
+            self.log_file_hardware("Server not reachable or passwordless connection is not working", 1)
+            return 146
+        if code4 != 0:
             self.log_file_hardware("Command execution issue for NAS hardware check", 1)
             return 148
-    def hardware_check_type(self):
+        return self.hardware_check_type(hard)
+    def hardware_check_type(self, hard):
         """
         This function will check the existing hardware type(Gen8,9,10 or Gen10+)
         """
-        if self.h2 in self.h4:
-            try:
-                hard = subprocess.check_output(self.out2)
-            except Exception:
-                self.log_file("Command execution issue for NAS media check", 1)
-                return 148
-            hard2 = hard[173:177]
-            self.log_file_hardware("Existing Hardware: {}".format(hard2), 1)
-            if "Gen8" in hard:
-                self.log_file_hardware("Existing NAS hardware not supported.Please upgrade to supported hardware", 1)
-                a = 141
-            else:
-                self.log_file_hardware("Existing NAS hardware is supported", 1)
-                a = 0
-            self.log_file_hardware("Successfully completed precheck for NAS hardware", 1)
-            return a
+        hard2 = hard[173:177]
+        self.log_file_hardware("Existing Hardware: {}".format(hard2), 1)
+        if "Gen8" in hard:
+            self.log_file_hardware("Existing NAS hardware not supported.Please upgrade to supported hardware", 1)
+            a = 141
         else:
-            d1="Passwordless connection is not working. Please re-establish passwordless connection"
-            self.log_file_hardware(d1, 1)
-            return 146
+            self.log_file_hardware("Existing NAS hardware is supported", 1)
+            a = 0
+        self.log_file_hardware("Successfully completed precheck for NAS hardware", 1)
+        return a
 def exit_gracefully_hardware(signum, frame):
     """
     restore the original signal handler
@@ -32,8 +32,7 @@ import signal
 import sys
 import logging
 import os
-import socket
-import subprocess
+import nas_facts
 """
 Global variables used within the script
 """
@@ -60,17 +59,13 @@ class precheckmedia(object):
             sys.exit(0)
         self.logger = logging.getLogger()
         self.logging_configs()
-        self.n2=""
-        self.n4=""
-        self.out4=""
+        self.facts = nas_facts.nasfacts()
     def check_hardware_media(self):
         """
         This function will check hardware type
         """
         try:
-            k = ['dmidecode','-t','chassis','|','grep -w "Type"']
-            k1 = subprocess.check_output(k)
-            if 'Blade' in k1:
+            if 'Blade' in nas_facts.deployment_type():
                 self.log_file("Current deployment type is Blade", 1)
                 return 0
             else:
@@ -137,53 +132,33 @@ class precheckmedia(object):
         if code1!=0:
             return code1
         self.log_file("Collecting details for NAS media", 1)
-        out8 = ["su", "-c", "ssh -o StrictHostKeyChecking=no -n support@nasconsole 'ls'", "storadm"]
-        n5 = out8[2].split()
-        n1 = n5[4]
-        self.n2 = n1.replace(" 'ls'", "")
-        n3 = self.n2.replace("support@", "")
-        try:
-            if socket.gethostbyaddr(n3):
-                y= "ssh -o StrictHostKeyChecking=no -n support@nasconsole 'cat /opt/VRTSnas/conf/banner'"
-                self.out4 = ["su", "-c",y, "storadm"]
-                self.n4=self.out4[2].split()
-                out7=self.nas_media_check()
-                return out7
-        except socket.herror:
-            self.log_file("Server not reachable", 1)
+        code2, nas = self.facts.fact("banner")
+        if code2 == 146:
+            self.log_file("Server not reachable or passwordless connection is not working", 1)
             return 146
-        except Exception:
+        if code2 != 0:
             self.log_file("Command execution issue for NAS media check",1)
             return 148
-    def nas_media_check(self):
+        return self.nas_media_check(nas)
+    def nas_media_check(self, nas):
         """
         This function will check the existing hardware type(Gen8,9,10 or Gen10+)
         """
-        if self.n2 in self.n4:
-            try:
-                nas = subprocess.check_output(self.out4)
-            except Exception:
-                self.log_file("Command execution issue for NAS media check", 1)
-                return 148
-            n = nas[187:196]
-            str1 = "Existing NAS media is {}".format(n)
-            str2 = "Targetted NAS media is {}".format(nas1)
-            if nas1 in nas:
-                self.log_file(str1, 1)
-                self.log_file(str2, 1)
-                self.log_file("Existing NAS media is upgraded", 1)
-                f = 0
-            else:
-                self.log_file(str1, 1)
-                self.log_file(str2, 1)
-                self.log_file("Existing NAS media needs to be upgraded to the target version", 1)
-                f = 142
-            self.log_file("Successfully completed precheck for NAS media", 1)
-            return f
+        n = nas[187:196]
+        str1 = "Existing NAS media is {}".format(n)
+        str2 = "Targetted NAS media is {}".format(nas1)
+        if nas1 in nas:
+            self.log_file(str1, 1)
+            self.log_file(str2, 1)
+            self.log_file("Existing NAS media is upgraded", 1)
+            f = 0
         else:
-            y1="Passwordless connection is not working. Please re-establish passwordless connection"
-            self.log_file(y1, 1)
-            return 146
+            self.log_file(str1, 1)
+            self.log_file(str2, 1)
+            self.log_file("Existing NAS media needs to be upgraded to the target version", 1)
+            f = 142
+        self.log_file("Successfully completed precheck for NAS media", 1)
+        return f
 def exit_gracefully_media(signum, frame):
     """
     restore the original signal handler
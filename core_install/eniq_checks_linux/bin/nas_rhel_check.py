@@ -32,8 +32,7 @@ import signal
 import sys
 import logging
 import os
-import socket
-import subprocess
+import nas_facts
 """
 Global variables used within the script
 """
@@ -60,17 +59,13 @@ class precheckrhel(object):
             sys.exit(0)
         self.logger = logging.getLogger()
         self.logging_configs()
-        self.c=""
-        self.b2=""
-        self.out=""
+        self.facts = nas_facts.nasfacts()
     def check_hardware_for_rhel(self):
         """
         This function will check hardware type
         """
         try:
-            c1 = ['dmidecode','-t','chassis','|','grep -w "Type"']
-            c2 = subprocess.check_output(c1)
-            if 'Blade' in c2:
+            if 'Blade' in nas_facts.deployment_type():
                 self.log_file_rhel("Current deployment type is Blade", 1)
                 return 0
             else:
@@ -136,58 +131,38 @@ class precheckrhel(object):
         code=self.check_hardware_for_rhel()
         if code!=0:
             return code
-        try:
-            self.log_file_rhel("Collecting details for NAS RHEL OS", 1)
-            out3 = ["su", "-c", "ssh -o StrictHostKeyChecking=no -n support@nasconsole 'ls'", "storadm"]
-            b=out3[2].split()
-            b1=b[4]
-            self.b2=b1.replace(" 'ls'","")
-            b3 = self.b2.replace("support@", "")
-            try:
-                if socket.gethostbyaddr(b3):
-                    g="ssh -o StrictHostKeyChecking=no -n support@nasconsole 'cat /etc/redhat-release'"
-                    self.out = ["su", "-c",g, "storadm"]
-                    self.c=self.out[2].split()
-                    out9=self.nas_rhel_version()
-                    return out9
-            except socket.herror:
-                self.log_file_rhel("Server not reachable", 1)
-                return 146
-        except Exception:
+        self.log_file_rhel("Collecting details for NAS RHEL OS", 1)
+        code1, release = self.facts.fact("release")
+        if code1 == 146:
+            self.log_file_rhel("Server not reachable or passwordless connection is not working", 1)
+            return 146
+        if code1 != 0:
             self.log_file_rhel("Command execution issue for NAS RHEL check",1)
             return 148
-    def nas_rhel_version(self):
+        return self.nas_rhel_version(release)
+    def nas_rhel_version(self, release):
         """
         This function will check the existing hardware type(Gen8,9,10 or Gen10+)
         """
-        if self.b2 in self.c:
-            try:
-                rhel = subprocess.check_output(self.out).split(' ')
-            except Exception:
-                self.log_file_rhel("Command execution issue for NAS RHEL check", 1)
-                return 148
-            rel = ''
-            for i in range(0, len(rhel)):
-                if 'release' == rhel[i]:
-                    rel = rel + rhel[i + 1]
-            str1 = "Existing rhel_version is {}".format(rel)
-            str2 = "Targeted rhel_version is {}".format(rhel1)
-            if rhel1 in rhel:
-                self.log_file_rhel(str1, 1)
-                self.log_file_rhel(str2, 1)
-                self.log_file_rhel("Existing RHEL Version is up to date", 1)
-                d = 0
-            else:
-                self.log_file_rhel(str1, 1)
-                self.log_file_rhel(str2, 1)
-                self.log_file_rhel("Existing RHEL version needs to be upgraded to the target version", 1)
-                d = 143
-            self.log_file_rhel("Successfully completed precheck for NAS RHEL OS", 1)
-            return d
+        rhel = release.split(' ')
+        rel = ''
+        for i in range(0, len(rhel)):
+            if 'release' == rhel[i]:
+                rel = rel + rhel[i + 1]
+        str1 = "Existing rhel_version is {}".format(rel)
+        str2 = "Targeted rhel_version is {}".format(rhel1)
+        if rhel1 in rhel:
+            self.log_file_rhel(str1, 1)
+            self.log_file_rhel(str2, 1)
+            self.log_file_rhel("Existing RHEL Version is up to date", 1)
+            d = 0
         else:
-            g1="Passwordless connection is not working. Please re-establish passwordless connection"
-            self.log_file_rhel(g1, 1)
-            return 146
+            self.log_file_rhel(str1, 1)
+            self.log_file_rhel(str2, 1)
+            self.log_file_rhel("Existing RHEL version needs to be upgraded to the target version", 1)
+            d = 143
+        self.log_file_rhel("Successfully completed precheck for NAS RHEL OS", 1)
+        return d
 def exit_gracefully_rhel(signum, frame):
     """
     restore the original signal handler
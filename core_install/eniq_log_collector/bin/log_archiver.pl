@@ -0,0 +1,130 @@
+#!/usr/bin/perl -w
+
+# ********************************************************************
+# Ericsson Radio Systems AB                                     SCRIPT
+# ********************************************************************
+#
+#
+# (c) Ericsson Radio Systems AB 2022 - All rights reserved.
+#
+# The copyright to the computer program(s) herein is the property
+# of Ericsson Radio Systems AB, Sweden. The programs may be used
+# and/or copied only with the written permission from Ericsson Radio
+# Systems AB or in accordance with the terms and conditions stipulated
+# in the agreement/contract under which the program(s) have been
+# supplied.
+#
+# ********************************************************************
+# Name    : log_archiver.pl
+# Purpose : Streams the logs collected by log_collector.bsh into a zip
+#           file without going over the maximum zip size. The logs are
+#           added smallest first. A log that does not fit is truncated
+#           and the logs after it are skipped, both are listed at the
+#           end of the summary file, which is always added last.
+#           The collected logs are removed once added, as zip -m does.
+# Usage   : log_archiver.pl -d <directory> -o <zip file> -b <max size in bytes>
+#                           [ -s <summary file name> ]
+# Exit Values:
+#     0 : All the logs added
+#     1 : Zip file created, some logs truncated or skipped
+#     2 : Error
+# ********************************************************************
+
+use strict;
+use Getopt::Std;
+use File::Basename;
+use File::Find;
+use File::Path;
+use IO::Compress::Zip qw(:all);
+
+# Size of the blocks read from the logs
+my $BLOCK_SIZE = 1048576;
+
+# Space kept for the data not yet written out by the compressor and
+# for the zip directory
+my $MARGIN = 2 * $BLOCK_SIZE;
+
+# Entries over 4GB need the zip64 extensions
+my $ZIP64_SIZE = 4294967295;
+
+my %args = ();
+getopts("d:o:b:s:", \%args);
+if ( !defined $args{d} || !defined $args{o} || !defined $args{b} || $args{b} !~ /^\d+$/ ) {
+    print "Usage: $0 -d <directory> -o <zip file> -b <max size in bytes> [ -s <summary file name> ]\n";
+    exit 2;
+}
+
+my $source_dir = $args{d};
+$source_dir =~ s/\/+$//;
+my $top_dir = basename($source_dir);
+my $summary = defined $args{s} ? "$source_dir/$args{s}" : "";
+my $max_size = $args{b};
+
+my @logs;
+find({ wanted => sub { push(@logs, $File::Find::name) if -f $_ && $File::Find::name ne $summary; }, no_chdir => 1 }, $source_dir);
+@logs = sort { -s $a <=> -s $b || $a cmp $b } @logs;
+
+open(my $out, '>', $args{o}) or exit 2;
+binmode($out);
+my $zip;
+my @notes;
+my $budget = $max_size - $MARGIN - ($summary && -f $summary ? -s $summary : 0);
+
+foreach my $log ( @logs ) {
+    if ( tell($out) >= $budget ) {
+        push(@notes, "SKIPPED : " . entry_name($log) . " - maximum zip file size reached");
+        next;
+    }
+    my ($added, $total) = add_log($log, $budget);
+    exit 2 if !defined $added;
+    if ( $added < $total ) {
+        push(@notes, "TRUNCATED : " . entry_name($log) . " - $added of $total bytes added, maximum zip file size reached");
+    }
+}
+
+if ( $summary && -f $summary ) {
+    if ( @notes ) {
+        open(my $fh, '>>', $summary) or exit 2;
+        print $fh "\n", join("\n", @notes), "\n";
+        close($fh);
+    }
+    exit 2 if !defined add_log($summary, undef);
+}
+
+if ( defined $zip ) {
+    $zip->close() or exit 2;
+}
+close($out) or exit 2;
+rmtree($source_dir);
+exit(@notes ? 1 : 0);
+
+# Name of the log in the zip file
+sub entry_name {
+    my ($log) = @_;
+    return $top_dir . substr($log, length($source_dir));
+}
+
+# Streams a log into the zip file until the compressed size reaches
+# the budget. Returns the number of bytes added and the log size.
+sub add_log {
+    my ($log, $limit) = @_;
+    my $size = -s $log;
+    my %options = ( Name => entry_name($log), Time => (stat($log))[9], Zip64 => $size > $ZIP64_SIZE ? 1 : 0 );
+    open(my $in, '<', $log) or return undef;
+    binmode($in);
+    if ( !defined $zip ) {
+        $zip = new IO::Compress::Zip $out, %options, AutoClose => 0 or return undef;
+    } else {
+        $zip->newStream(%options) or return undef;
+    }
+    my $added = 0;
+    while ( !defined $limit || tell($out) < $limit ) {
+        my $read = read($in, my $buffer, $BLOCK_SIZE);
+        return undef if !defined $read;
+        last if $read == 0;
+        $zip->print($buffer) or return undef;
+        $added += $read;
+    }
+    close($in);
+    return ($added, $size);
+}
@@ -0,0 +1,245 @@
+#!/usr/bin/perl -w
+
+# ********************************************************************
+# Ericsson Radio Systems AB                                     SCRIPT
+# ********************************************************************
+#
+#
+# (c) Ericsson Radio Systems AB 2022 - All rights reserved.
+#
+# The copyright to the computer program(s) herein is the property
+# of Ericsson Radio Systems AB, Sweden. The programs may be used
+# and/or copied only with the written permission from Ericsson Radio
+# Systems AB or in accordance with the terms and conditions stipulated
+# in the agreement/contract under which the program(s) have been
+# supplied.
+#
+# ********************************************************************
+# Name    : log_slicer.pl
+# Purpose : Copies the lines of a log file from the first to the last
+#           line containing the date pattern, as log_collector.bsh
+#           collects them. When the log is ordered by a timestamp in
+#           the format of the date pattern, the window is located by
+#           a binary search on the byte offset. Otherwise the log is
+#           read once.
+# Usage   : log_slicer.pl -f <log file> -o <output file> -p <date pattern>
+#                         [ -t <date template> -y <year> -m <month> -d <day> ]
+#           -t is the registry date pattern, e.g. echo ${yyyy}-${mm}-${dd},
+#           with -y -m -d the values it was evaluated with.
+# Exit Values:
+#     0 : Window copied to the output file
+#     1 : Date pattern not found in the log file
+#     2 : Error
+# ********************************************************************
+
+use strict;
+use Getopt::Std;
+
+# Size under which the binary search turns into a linear scan
+my $BLOCK_SIZE = 65536;
+
+# Number of offsets checked to decide whether the log is ordered
+my $SAMPLES = 16;
+
+# Lines copied after the match when the date pattern is found only once
+my $SINGLE_MATCH_LINES = 8;
+
+my %months = ( 'Jan' => 1, 'Feb' => 2, 'Mar' => 3, 'Apr' => 4, 'May' => 5, 'Jun' => 6,
+               'Jul' => 7, 'Aug' => 8, 'Sep' => 9, 'Oct' => 10, 'Nov' => 11, 'Dec' => 12 );
+
+my %args = ();
+getopts("f:o:p:t:y:m:d:", \%args);
+if ( !defined $args{f} || !defined $args{o} || !defined $args{p} || $args{p} eq "" ) {
+    print "Usage: $0 -f <log file> -o <output file> -p <date pattern> [ -t <date template> -y <year> -m <month> -d <day> ]\n";
+    exit 2;
+}
+
+my $log_file = $args{f};
+my $out_file = $args{o};
+my $pattern = qr/$args{p}/;
+
+open(my $log, '<', $log_file) or exit 2;
+binmode($log);
+my $size = -s $log;
+
+my ($stamp, $order, $target) = stamp_format();
+if ( defined $stamp && is_ordered() ) {
+    exit copy_window(window_start(), 1);
+}
+exit copy_window(0, 0);
+
+# Builds the regex of a timestamp from the date template, with the order
+# of the year, month and day in it and the key of the requested date.
+# Only templates with a year, a month and a day are supported.
+sub stamp_format {
+    return () if !defined $args{t} || !defined $args{y} || !defined $args{m} || !defined $args{d};
+    my $template = $args{t};
+    $template =~ s/^\s*echo\s+//;
+    $template =~ s/"//g;
+    my %values = ( 'yyyy' => $args{y}, 'mm' => $args{m}, 'dd' => $args{d} );
+    my ($regex, @fields) = ("");
+    foreach my $part ( split(/(\$\{?(?:yyyy|mm|dd)\}?)/, $template) ) {
+        if ( $part =~ /^\$\{?(yyyy|mm|dd)\}?$/ ) {
+            my $value = $values{$1};
+            push(@fields, $1);
+            if ( $value =~ /^[A-Z][a-z]{2}$/ ) {
+                $regex .= '([A-Z][a-z]{2})';
+            } elsif ( $value =~ /^ \d$/ ) {
+                $regex .= '([ \d]\d)';
+            } else {
+                $regex .= '(\d{' . length($value) . '})';
+            }
+        } else {
+            $regex .= quotemeta($part);
+        }
+    }
+    return () if join(",", sort @fields) ne "dd,mm,yyyy";
+    my $target_key = date_key(\@fields, map { $values{$_} } @fields);
+    return () if !defined $target_key;
+    return (qr/$regex/, \@fields, $target_key);
+}
+
+# Converts the date fields into a comparable number
+sub date_key {
+    my ($fields, @values) = @_;
+    my %date;
+    @date{@$fields} = @values;
+    my $month = $date{mm} =~ /^\d+$/ ? $date{mm} : $months{$date{mm}};
+    return undef if !defined $month;
+    my $day = $date{dd};
+    $day =~ s/ //g;
+    return $date{yyyy} * 10000 + $month * 100 + $day;
+}
+
+# Returns the date key of a line, or undef if it has no timestamp
+sub line_key {
+    my ($line) = @_;
+    my @values = $line =~ $stamp;
+    return undef if !@values;
+    return date_key($order, @values);
+}
+
+# Returns the offset and key of the first line with a timestamp
+# starting at or after the offset
+sub next_stamp {
+    my ($offset) = @_;
+    seek($log, $offset, 0);
+    if ( $offset > 0 ) {
+        seek($log, $offset - 1, 0);
+        <$log>;
+    }
+    while (1) {
+        my $line_offset = tell($log);
+        my $line = <$log>;
+        return () if !defined $line;
+        my $key = line_key($line);
+        return ($line_offset, $key) if defined $key;
+    }
+}
+
+# Checks on a sample of offsets that the timestamps never go backwards
+sub is_ordered {
+    my $previous;
+    for ( my $i = 0; $i <= $SAMPLES; $i++ ) {
+        my ($offset, $key) = next_stamp(int($size * $i / $SAMPLES));
+        next if !defined $key;
+        return 0 if defined $previous && $key < $previous;
+        $previous = $key;
+    }
+    return defined $previous;
+}
+
+# Binary search of the offset from which the window is searched. All the
+# lines before the returned offset have a timestamp before the date.
+sub window_start {
+    my ($low, $high) = (0, $size);
+    while ( $high - $low > $BLOCK_SIZE ) {
+        my $mid = int(($low + $high) / 2);
+        my ($offset, $key) = next_stamp($mid);
+        if ( !defined $key || $key >= $target ) {
+            $high = $mid;
+        } else {
+            $low = $mid;
+        }
+    }
+    return $low;
+}
+
+# Copies the lines from the first to the last line matching the date
+# pattern, starting the search at the offset. With $ordered set, the
+# search stops at the first timestamp after the date.
+sub copy_window {
+    my ($offset, $ordered) = @_;
+    my ($out, $first_end, $pending_start, @pending);
+    my $matches = 0;
+    seek($log, $offset, 0);
+    if ( $offset > 0 ) {
+        seek($log, $offset - 1, 0);
+        <$log>;
+    }
+    while (1) {
+        my $line_start = tell($log);
+        my $line = <$log>;
+        last if !defined $line;
+        if ( $ordered ) {
+            my $key = line_key($line);
+            last if defined $key && $key > $target;
+        }
+        if ( $line =~ $pattern ) {
+            if ( !defined $out ) {
+                open($out, '>', $out_file) or return 2;
+                binmode($out);
+                $first_end = tell($log);
+            }
+            print $out @pending, $line;
+            @pending = ();
+            $matches++;
+        } elsif ( defined $out ) {
+            $pending_start = $line_start if !@pending;
+            push(@pending, $line);
+            # Without the ordering the window can only end at a later match,
+            # find it from the offsets instead of keeping the lines
+            if ( !$ordered && @pending > $BLOCK_SIZE / 64 ) {
+                @pending = ();
+                $matches += copy_to_last_match($out, $pending_start);
+                last;
+            }
+        }
+    }
+    return 1 if !defined $out;
+    if ( $matches == 1 ) {
+        seek($log, $first_end, 0);
+        for ( my $i = 0; $i < $SINGLE_MATCH_LINES; $i++ ) {
+            my $line = <$log>;
+            last if !defined $line;
+            print $out $line;
+        }
+    }
+    close($out) or return 2;
+    return 0;
+}
+
+# Finds the end of the last line matching the date pattern after the
+# offset, then copies the lines up to it
+sub copy_to_last_match {
+    my ($out, $from) = @_;
+    my ($last_end, $matches) = (undef, 0);
+    seek($log, $from, 0);
+    while ( my $line = <$log> ) {
+        if ( $line =~ $pattern ) {
+            $last_end = tell($log);
+            $matches++;
+        }
+    }
+    return 0 if !defined $last_end;
+    seek($log, $from, 0);
+    my $remaining = $last_end - $from;
+    while ( $remaining > 0 ) {
+        my $chunk = $remaining > $BLOCK_SIZE ? $BLOCK_SIZE : $remaining;
+        my $read = read($log, my $buffer, $chunk);
+        last if !$read;
+        print $out $buffer;
+        $remaining -= $read;
+    }
+    return $matches;
+}
@@ -0,0 +1,398 @@
+#!/usr/bin/env perl
+
+use strict;
+use vars qw/ %opt /;
+use Getopt::Std;
+use File::Basename;
+
+sub GETOPTIONS {
+    my ${OPT_STR} = 'c:i:o:h ';
+getopts( "${OPT_STR}", \%opt ) || die "ERROR : Unable to prcess the options $! \n";
+USAGE () if ( (! $opt{c}) || (! $opt{i}) || ($opt{h}) );
+}
+
+sub USAGE {
+    print STDERR << "EOF";
+
+usage: $0 -c <command file> -i <input file name> [-o <output file name>]
+    -h              : this (help) message
+    -c                : full path of file containing the changes, one per line:
+                          add <main tag> <secondary tag> <data file>   as iniadd.pl
+                          del <main tag|-> [<secondary tag>]           as inidel.pl
+                          set <block> <param>=<value>                  as iniset
+    -i                : full path of input file.
+    -o                : full path of output file. The input file is replaced when not given.
+The changes are applied in order on the file read once, and the output is
+only written when all of them succeed.
+example: $0 -c /var/tmp/ini_changes -i /ericsson/config/system.ini
+EOF
+exit 9;
+}
+
+sub main
+{
+    GETOPTIONS ();
+
+    my $inFile = $opt{i};
+    my $outFile = $opt{o};
+
+    open CMD_FILE, $opt{c} or die "ERROR: Cannot open $opt{c}";
+    my @commands = <CMD_FILE>;
+    close CMD_FILE;
+
+    open IN_FILE, $inFile or die "ERROR: Cannot open $inFile";
+    my @lines = <IN_FILE>;
+    close IN_FILE;
+
+    foreach my $command ( @commands )
+    {
+	chomp $command;
+	next if ( $command =~ /^\s*$/ || $command =~ /^\s*#/ );
+
+	my ($op, $rest) = split(/\s+/, $command, 2);
+	if ( $op eq "add" )
+	{
+	    my ($grandParent, $parent, $dataFile) = split(/\s+/, $rest);
+	    die "ERROR: Invalid change $command" if ( ! defined $dataFile );
+	    open DATA_FILE, $dataFile or die "ERROR: Cannot open $dataFile";
+	    my @dataLines = <DATA_FILE>;
+	    close DATA_FILE;
+	    @lines = addSection(\@lines, $grandParent, $parent, \@dataLines);
+	}
+	elsif ( $op eq "del" )
+	{
+	    my ($grandParent, $parent) = split(/\s+/, $rest);
+	    die "ERROR: Invalid change $command" if ( ! defined $grandParent );
+	    undef $grandParent if ( $grandParent eq "-" );
+	    @lines = delSection(\@lines, $grandParent, $parent);
+	}
+	elsif ( $op eq "set" )
+	{
+	    my ($block, $param) = split(/\s+/, $rest, 2);
+	    die "ERROR: Invalid change $command" if ( ! defined $param );
+	    @lines = setParam(\@lines, $block, $param);
+	}
+	else
+	{
+	    die "ERROR: Invalid change $command";
+	}
+    }
+
+    writeFile($inFile, $outFile, \@lines);
+}
+
+# Same state machine as iniadd.pl
+sub addSection
+{
+    my ($lines, $grandParent, $parent, $dataLines) = @_;
+
+    my $LOOK_FOR_GP = 0;
+    my $LOOK_FOR_SIB_LIST = 1;
+    my $LOOK_FOR_SIB_SECT_START = 2;
+    my $LOOK_FOR_SIB_SECT_END = 3;
+    my $LOOK_FOR_END = 4;
+
+    my $state = $LOOK_FOR_GP;
+    my %siblings = ();
+    my $sect_name;
+    my @out = ();
+    my @data = ("\n", @$dataLines, "\n");
+
+    foreach my $line ( @$lines )
+    {
+	if ( $state == $LOOK_FOR_GP )
+	{
+	    push(@out, $line);
+	    if ( $line =~ /^\[$grandParent\]$/ )
+	    {
+		$state = $LOOK_FOR_SIB_LIST;
+	    }
+	}
+	elsif ( $state == $LOOK_FOR_SIB_LIST )
+	{
+	    if ( $line =~ /^(\S+)$/ )
+	    {
+		my $sib = $1;
+		$siblings{$sib} = 1;
+
+		# We'll alway put the parent at the end of the grandParent section
+		if ( $sib ne $parent )
+		{
+		    push(@out, $line);
+		}
+	    }
+	    elsif ( $line =~ /^\s*$/ )
+	    {
+		push(@out, "$parent\n", $line);
+		if ( ! %siblings )
+		{
+		    push(@out, @data);
+		    $state = $LOOK_FOR_END;
+		}
+		else
+		{
+		    $state = $LOOK_FOR_SIB_SECT_START;
+		}
+	    }
+	}
+	elsif ( $state == $LOOK_FOR_SIB_SECT_START )
+	{
+	    if ( $line =~ /^\[(\S+)\]$/ )
+	    {
+		$sect_name = $1;
+		if ( exists $siblings{$sect_name} )
+		{
+		    delete $siblings{$sect_name};
+		}
+		else
+		{
+		    die "ERROR: Unexpected section $sect_name";
+		}
+
+		$state = $LOOK_FOR_SIB_SECT_END;
+
+		# Don't keep the lines belonging to the parent section
+		if ( $sect_name ne $parent )
+		{
+		    push(@out, $line);
+		}
+	    }
+	    else
+	    {
+		push(@out, $line);
+	    }
+	}
+	elsif ( $state == $LOOK_FOR_SIB_SECT_END )
+	{
+	    if ( $sect_name ne $parent )
+	    {
+		push(@out, $line);
+	    }
+
+	    if ( ($line =~ /^\s*$/) || ($line =~ /^\;/) )
+	    {
+		if ( ! %siblings )
+		{
+		    push(@out, @data);
+		    $state = $LOOK_FOR_END;
+		}
+		else
+		{
+		    $state = $LOOK_FOR_SIB_SECT_START;
+		}
+	    }
+	}
+	else
+	{
+	    push(@out, $line);
+	}
+    }
+
+    if ( $state != $LOOK_FOR_END )
+    {
+	if ( ! %siblings )
+	{
+	    push(@out, @data);
+	}
+	else
+	{
+	    die "ERROR: End of input reached while searching for sections";
+	}
+    }
+    return @out;
+}
+
+# Same state machine as inidel.pl
+sub delSection
+{
+    my ($lines, $grandParent, $parent) = @_;
+
+    my $LOOK_FOR_GP = 0;
+    my $LOOK_FOR_SIB_LIST = 1;
+    my $LOOK_FOR_SIB_SECT_START = 2;
+    my $LOOK_FOR_SIB_SECT_END = 3;
+
+    my $removeGrandParent = ( defined $grandParent && ! defined $parent );
+    my %siblings = ();
+    my $state = $LOOK_FOR_GP;
+    my $sect_name;
+    my @out = ();
+
+    if ( defined $parent )
+    {
+	$siblings{$parent} = 1;
+    }
+    if ( ! defined $grandParent )
+    {
+	$state = $LOOK_FOR_SIB_SECT_START;
+    }
+
+    foreach my $line ( @$lines )
+    {
+	if ( $state == $LOOK_FOR_GP )
+	{
+	    if ( $line =~ /^\[$grandParent\]$/ )
+	    {
+		$state = $LOOK_FOR_SIB_LIST;
+
+		# Don't keep the grandParent if we are removing it
+		if ( ! $removeGrandParent )
+		{
+		    push(@out, $line);
+		}
+	    }
+	    else
+	    {
+		push(@out, $line);
+	    }
+	}
+	elsif ( $state == $LOOK_FOR_SIB_LIST )
+	{
+	    if ( $line =~ /^(\S+)$/ )
+	    {
+		my $sib = $1;
+
+		if ( ! $removeGrandParent && $sib ne $parent )
+		{
+		    push(@out, $line);
+		}
+		if ( $removeGrandParent )
+		{
+		    $siblings{$sib} = 1;
+		}
+	    }
+	    else
+	    {
+		$state = $LOOK_FOR_SIB_SECT_START;
+		push(@out, $line);
+	    }
+	}
+	elsif ( $state == $LOOK_FOR_SIB_SECT_START )
+	{
+	    if ( $line =~ /^\[(\S+)\]$/ )
+	    {
+		$sect_name = $1;
+		if ( defined $siblings{$sect_name} && $siblings{$sect_name} == 1 )
+		{
+		    $siblings{$sect_name} = 2;
+		}
+		else
+		{
+		    push(@out, $line);
+		}
+		$state = $LOOK_FOR_SIB_SECT_END;
+	    }
+	    else
+	    {
+		push(@out, $line);
+	    }
+	}
+	elsif ( $state == $LOOK_FOR_SIB_SECT_END )
+	{
+	    if ( ! exists $siblings{$sect_name} )
+	    {
+		push(@out, $line);
+	    }
+
+	    if ( ($line =~ /^\s*$/) || ($line =~ /^\;/) )
+	    {
+		$state = $LOOK_FOR_SIB_SECT_START;
+	    }
+	}
+    }
+
+    foreach my $sib ( keys %siblings )
+    {
+	if ( $siblings{$sib} != 2 )
+	{
+	    die "ERROR: Failed to delete $sib\n";
+	}
+    }
+    return @out;
+}
+
+# Same rules as iniset in common_functions.lib, trailing spaces
+# are removed from every line
+sub setParam
+{
+    my ($lines, $block, $param) = @_;
+
+    my ($name) = split(/=/, $param, 2);
+    (my $value = $param) =~ s/^[^=]*=//;
+    my $pending = 1;
+    my ($found, $edited) = (0, 0);
+    my $last = "";
+    my @out = ();
+
+    foreach my $line ( @$lines )
+    {
+	(my $text = $line) =~ s/ *\n?$//;
+	$last = $text;
+	my ($key) = split(/=/, $text, 2);
+	$key = "" if ( ! defined $key );
+
+	if ( $key eq "[$block]" )
+	{
+	    die "ERROR: Multiple instances of [$block] found" if ( $edited );
+	    $found = 1;
+	    push(@out, "$text\n");
+	    next;
+	}
+	if ( ! $found )
+	{
+	    push(@out, "$text\n");
+	    next;
+	}
+	if ( $text =~ /^ *\[/ )
+	{
+	    # End of block, add the parameter if it was not there
+	    push(@out, "$name=$value\n") if ( $pending );
+	    $pending = 0;
+	    $found = 0;
+	    $edited = 1;
+	    push(@out, "$text\n");
+	    next;
+	}
+	if ( $pending && $key eq $name )
+	{
+	    push(@out, "$name=$value\n");
+	    $pending = 0;
+	    next;
+	}
+	push(@out, "$text\n");
+    }
+
+    if ( $found )
+    {
+	push(@out, "$name=$value\n") if ( $pending );
+    }
+    elsif ( ! $edited )
+    {
+	push(@out, "$last\n", "[$block]\n", "$name=$value\n");
+    }
+    return @out;
+}
+
+# Writes the result next to the input file and renames it over the
+# input, keeping its owner and permissions, unless an output is given
+sub writeFile
+{
+    my ($inFile, $outFile, $lines) = @_;
+
+    my $tmpFile = defined $outFile ? "$outFile.$$" : dirname($inFile) . "/." . basename($inFile) . ".$$";
+    open OUT_FILE, ">$tmpFile" or die "ERROR: Cannot open $tmpFile";
+    print OUT_FILE @$lines;
+    close OUT_FILE or die "ERROR: Cannot write $tmpFile";
+
+    if ( ! defined $outFile )
+    {
+	my @stat = stat($inFile);
+	chmod($stat[2] & 07777, $tmpFile);
+	chown($stat[4], $stat[5], $tmpFile);
+	$outFile = $inFile;
+    }
+    rename($tmpFile, $outFile) or die "ERROR: Cannot rename $tmpFile to $outFile";
+}
+
+
+main();
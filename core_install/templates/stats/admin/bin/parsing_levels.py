@@ -35,6 +35,356 @@ from decimal import Decimal
 import datetime
 from shutil import copy2
 import csv
+import marshal
+import multiprocessing
+import collections
+import glob
+
+class Substring_Lookup:
+
+    ''' Find which names occur inside a text using hash lookups instead of scanning every name '''
+
+    word_pattern=re.compile(r'[A-Za-z0-9_]+')
+    name_pattern=re.compile(r'[A-Za-z0-9_]+\Z')
+
+    def __init__(self,names):
+        self.names=set()
+        self.other_names=[]
+        self.match_all=False
+        for name in names:
+            if not name:
+                # Empty name is part of every text
+                self.match_all=True
+            elif self.name_pattern.match(name):
+                self.names.add(name)
+            else:
+                self.other_names.append(name)
+        self.lengths=sorted(set(len(name) for name in self.names))
+
+    def find_all(self,text,first_only=False):
+        ''' Get the names present in text, a name made of word characters can only lie within one word of text '''
+        found=[]
+        for word in self.word_pattern.findall(text):
+            word_length=len(word)
+            for length in self.lengths:
+                if length > word_length:
+                    break
+                for index in range(word_length-length+1):
+                    if word[index:index+length] in self.names:
+                        found.append(word[index:index+length])
+                        if first_only:
+                            return found
+        for name in self.other_names:
+            if name in text:
+                found.append(name)
+                if first_only:
+                    return found
+        return found
+
+    def contains(self,text):
+        ''' Check if any name is present in text '''
+        return self.match_all or bool(self.find_all(text,True))
+
+
+class Query_Tokenizer:
+
+    ''' Precompiled tokens for breaking down the select queries collected from RLL logs '''
+
+    select_pattern=re.compile('select')
+    decimal_pattern=re.compile(r'\d+\.\d+')
+    select_top_pattern=re.compile(r'select top \d+\ \*')
+
+    def __init__(self,tables,excluded_tables):
+        self.query_tokens=self.compile_tokens(['partitions','"','union ','union all','all ','\'','and ','sum(','min(','max(','avg(','if(','if ','(',')'])
+        self.table_tokens=self.compile_tokens(['"','dc.','dim.','\'','and ','min(','max(','avg(','sum(','dcpublic.','dcbo.','(',')'])
+        self.alias_table_tokens=self.compile_tokens(['"','dc.','dim.','\'', 'as ','and ','min(','max(','avg(','sum(','dcpublic.','dcbo.','(',')'])
+        self.table_name_tokens=self.compile_tokens(['"','dc.','dim.','\'','(',')','dcpublic.','dcbo.'])
+        self.counter_tokens=self.compile_tokens(['distinct ','distinct(','"','sum(','dc.','dim.','*','as ','\'','if(','if ','count ','count(','results ','result ','and ','min(','max(','avg(','dcpublic.','dcbo.','(',')',' in ',' else ','ifnull','null','/','yyyy-mm-dd','e2e--mme','-','{','}',' end','substring','charindex','then '],
+            {'*':' ',' in ':' ','null':' ','then ':' ',' else ':',','-':',','/':',','ifnull':','})
+        self.tables_pattern=self.compile_names(tables)
+        self.tables_upper_pattern=self.compile_names([t.upper() for t in tables])
+        self.exclude_pattern=self.compile_names(excluded_tables)
+        self.exclude_upper_pattern=self.compile_names([t.upper() for t in excluded_tables])
+
+    def compile_tokens(self,tokens,replacements=None):
+        ''' Compile tokens into one pattern, earlier tokens win where they start at the same position '''
+        replacements=replacements or {}
+        pattern=re.compile('|'.join(re.escape(token) for token in tokens))
+        return lambda text: pattern.sub(lambda match: replacements.get(match.group(0),''), text)
+
+    def compile_names(self,names):
+        ''' Compile names into a pattern searching for any of them '''
+        if not names:
+            return re.compile(r'(?!)')
+        return re.compile('|'.join(re.escape(name) for name in names))
+
+    def is_table(self,name):
+        ''' Check if name refers to a table to be considered '''
+        return bool(self.tables_pattern.search(name)) and not self.exclude_pattern.search(name)
+
+    def is_table_upper(self,name):
+        ''' Check if upper case name refers to a table to be considered '''
+        return bool(self.tables_upper_pattern.search(name)) and not self.exclude_upper_pattern.search(name)
+
+    def split_selects(self,line):
+        ''' Segregate joint select queries in single query '''
+        index_list=[match.start() for match in self.select_pattern.finditer(line)]
+        if len(index_list) <= 1:
+            return [line]
+        index_list.append(None)
+        return [line[index_list[i]:index_list[i+1]].strip() for i in range(len(index_list)-1)]
+
+    def from_clause(self,query):
+        ''' Get the text between from and where '''
+        c, d = query.find("from "), query.find("where")
+        if d == -1:
+            return query[c + 5:].strip()
+        return query[c + 5:d].strip()
+
+    def select_clause(self,query):
+        ''' Get the text between select and from '''
+        a, b = query.find('select '), query.find('from')
+        return query[a + 7:b].strip()
+
+
+class Cached_Index:
+
+    ''' Data built from source files by the build function, cached on disk with the size and modification time of those files '''
+
+    description="Index"
+
+    def __init__(self,source_files,index_file,build):
+        self.source_files=source_files
+        self.index_file=index_file
+        self.build=build
+
+    def signature(self):
+        ''' Size and modification time of every file the index is built from '''
+        signature=[]
+        for source_file in self.source_files:
+            if os.path.isfile(source_file):
+                stat=os.stat(source_file)
+                signature.append([stat.st_size,int(stat.st_mtime)])
+            else:
+                signature.append(None)
+        return signature
+
+    def load(self):
+        ''' Load the cached index, rebuilding it if any of the source files has changed '''
+        signature=self.signature()
+        if os.path.isfile(self.index_file):
+            try:
+                with open(self.index_file,'rb') as index:
+                    index_signature,data=marshal.load(index)
+                if index_signature == signature:
+                    return data
+            except (EOFError,ValueError,TypeError):
+                pass
+            logging.info("{} {} is out of date. Rebuilding it".format(self.description,self.index_file))
+        data=self.build()
+        self.save(signature,data)
+        return data
+
+    def save(self,signature,data):
+        ''' Write the index next to its final name and rename it, so that it is never read half written '''
+        temp_index_file=self.index_file+".tmp_"+str(os.getpid())
+        try:
+            with open(temp_index_file,'wb') as index:
+                marshal.dump([signature,data],index)
+            os.rename(temp_index_file,self.index_file)
+        except (IOError,OSError):
+            logging.info("Could not save {} {}".format(self.description.lower(),self.index_file))
+
+
+class Master_Index(Cached_Index):
+
+    ''' Table to counters mapping of the master file, cached on disk next to the master file '''
+
+    description="Master file index"
+
+    def __init__(self,master_file):
+        Cached_Index.__init__(self,[master_file],master_file+".idx",self.read_master_file)
+        self.master_file=master_file
+        self.table_counters=self.load()
+        self.tables=Substring_Lookup(self.table_counters.keys())
+        self.table_cache={}
+
+    def read_master_file(self):
+        ''' Read the master file into upper case table names with lower case counter names '''
+        table_counters={}
+        with open(self.master_file,'r') as master_file_for_counters_info:
+            for master_data in master_file_for_counters_info:
+                fields=master_data.rstrip('\n').split('::')
+                counters=table_counters.setdefault(fields[0].upper(),set())
+                if len(fields) > 1:
+                    counters.add(fields[1].lower())
+        return table_counters
+
+    def has_table(self,table_name):
+        ''' Check if any master file table is part of the table name '''
+        return self.tables.contains(table_name)
+
+    def get_counters(self,table_name):
+        ''' Get the counters of every master file table which is part of the table name '''
+        if table_name not in self.table_cache:
+            table_specific_counters=set()
+            for tp_name in self.tables.find_all(table_name):
+                table_specific_counters.update(self.table_counters[tp_name])
+            self.table_cache[table_name]=table_specific_counters
+        return self.table_cache[table_name]
+
+
+class Feature_Index(Cached_Index):
+
+    ''' Table prefix to feature mapping built from the techpack, interface and feature files '''
+
+    description="Feature mapping index"
+    word_pattern=re.compile(r"[A-Za-z0-9_]+")
+
+    def __init__(self,tp_table_mapping_file,intf_tp_file,feature_techpacks_file,feature_descriptions_file,index_file):
+        Cached_Index.__init__(self,[tp_table_mapping_file,intf_tp_file,feature_techpacks_file,feature_descriptions_file],index_file,self.join_features)
+        self.table_features=self.load()
+
+    def read_lines(self,source_file):
+        ''' Lines of a source file, nothing if the file is not present '''
+        if not os.path.isfile(source_file):
+            logging.info("{} not found for feature mapping".format(source_file))
+            return []
+        with open(source_file,'r') as infile:
+            return [line.rstrip('\n') for line in infile if line.strip()]
+
+    def word_map(self,lines,get_value):
+        ''' Map every word of the lines in lower case to the values taken from those lines '''
+        words={}
+        for line in lines:
+            for word in set(self.word_pattern.findall(line.lower())):
+                words.setdefault(word,set()).add(get_value(line))
+        return words
+
+    def join_features(self):
+        ''' Join the four source files into the features of every 3 field table prefix '''
+        tp_table_mapping, intf_tp, feature_techpacks, feature_descriptions=[self.read_lines(f) for f in self.source_files]
+
+        prefix_techpacks={}
+        for line in tp_table_mapping:
+            for field in line.split(':'):
+                parts=field.split('_')
+                if len(parts) > 3:
+                    prefix_techpacks.setdefault("_".join(parts[:3]),set()).add(line.split(':')[0])
+
+        techpack_interfaces={}
+        for line in intf_tp:
+            fields=line.split()
+            for tp_name in fields[1:]:
+                techpack_interfaces.setdefault(tp_name,[]).append(fields[0])
+
+        interface_cxcs=self.word_map(feature_techpacks,lambda line: line.split(':')[0])
+        cxc_features=self.word_map(feature_descriptions,lambda line: line.split('::')[1] if '::' in line else '')
+
+        table_features={}
+        for prefix, tp_names in prefix_techpacks.items():
+            feature_list=[]
+            for tp_name in sorted(tp_names):
+                cxcs=set()
+                for interface in techpack_interfaces.get(tp_name,[]):
+                    cxcs.update(interface_cxcs.get(interface.lower(),()))
+                features=set()
+                for cxc in cxcs:
+                    features.update(cxc_features.get(cxc.lower(),()))
+                feature_list.extend(sorted(features))
+            if feature_list:
+                table_features[prefix]="|".join(feature_list)
+        return table_features
+
+    def map_features(self,input_file,output_file,missing_feature=None):
+        ''' Append the feature of the table to every line of the input file '''
+        prefix_lines={}
+        with open(input_file,'r') as infile:
+            for line in infile:
+                line=line.rstrip('\n')
+                if line:
+                    prefix_lines.setdefault("_".join(line.split('::')[0].split('_')[:3]),[]).append(line)
+        with open(output_file,'w') as outfile:
+            for prefix in sorted(prefix_lines):
+                feature=self.table_features.get(prefix)
+                if feature is None:
+                    logging.info("WARNING:Feature not found for {}".format(prefix))
+                    feature=missing_feature
+                if feature is None:
+                    outfile.writelines(line+"\n" for line in prefix_lines[prefix])
+                else:
+                    outfile.writelines(line+"::"+feature+"\n" for line in prefix_lines[prefix])
+
+
+class Demarcation_Index:
+
+    ''' Persistent byte offsets of the demarcations seen in raw data files '''
+
+    demarcation_pattern=re.compile(r"'([^'\s]+_demarcation_\d+)'")
+
+    def __init__(self,index_file="demarcation_offset_index"):
+        self.index_file=index_file
+        self.entries={}
+        if not os.path.isfile(index_file):
+            return
+        with open(index_file,'r') as index:
+            for line in index:
+                fields=line.rstrip('\n').split('::')
+                if len(fields) != 7:
+                    continue
+                markers={}
+                for marker in fields[6].split(','):
+                    if '=' in marker:
+                        marker_name,offset=marker.rsplit('=',1)
+                        markers[marker_name]=int(offset)
+                self.entries[fields[0]]={'inode':int(fields[1]),'size':int(fields[2]),'mtime':int(fields[3]),'scanned':int(fields[4]),'complete':fields[5] == '1','markers':markers}
+
+    def lookup(self,raw_file):
+        ''' Get the index entry of a raw data file if it still describes the file on disk '''
+        entry=self.entries.get(raw_file)
+        if not entry or not os.path.exists(raw_file):
+            return None
+        stat=os.stat(raw_file)
+        if stat.st_ino != entry['inode']:
+            return None
+        if raw_file.endswith('.tar.gz'):
+            # Archives never change once created
+            if stat.st_size != entry['size'] or int(stat.st_mtime) != entry['mtime']:
+                return None
+        elif stat.st_size < entry['size'] or int(stat.st_mtime) < entry['mtime']:
+            # Current files only grow, anything else means the file was rewritten
+            return None
+        return entry
+
+    def update(self,raw_file,scanned,complete,markers):
+        ''' Record the scanned offset and demarcations found in a raw data file '''
+        if not os.path.exists(raw_file):
+            return
+        stat=os.stat(raw_file)
+        entry=self.lookup(raw_file)
+        if entry:
+            for marker_name,offset in entry['markers'].items():
+                markers.setdefault(marker_name,offset)
+            scanned=max(scanned,entry['scanned'])
+            complete=complete or entry['complete']
+        self.entries[raw_file]={'inode':stat.st_ino,'size':stat.st_size,'mtime':int(stat.st_mtime),'scanned':scanned,'complete':complete,'markers':markers}
+
+    def clear(self):
+        ''' Forget all recorded offsets '''
+        self.entries={}
+
+    def save(self):
+        ''' Write the index for files still present, replacing the previous index atomically '''
+        temp_index_file=self.index_file+".tmp"
+        with open(temp_index_file,'w') as index:
+            for raw_file in sorted(self.entries):
+                if not os.path.exists(raw_file):
+                    continue
+                entry=self.entries[raw_file]
+                markers=",".join(marker_name+"="+str(offset) for marker_name,offset in sorted(entry['markers'].items(), key=lambda marker: marker[1]))
+                index.write("::".join([raw_file,str(entry['inode']),str(entry['size']),str(entry['mtime']),str(entry['scanned']),'1' if entry['complete'] else '0',markers])+"\n")
+        os.rename(temp_index_file,self.index_file)
+
 
 class Parsing_Level_1:
 
@@ -48,270 +398,247 @@ class Parsing_Level_1:
             demark.write(a+'\n')
             demark.truncate()
 
+    def get_metadata_value(self):
+        ''' Get the demarcation instance saved in metadata file '''
+        if not os.path.isfile("demarcation_metadata_file"):
+            return ""
+        with open("demarcation_metadata_file",'r') as demark:
+            return demark.read().strip()
 
-        
-    def get_start_end(self,file_containing_start_pattern=sys.argv[4]):
-        ''' Get the file containing demarcation and the demarcation instance '''
-        metadata_file = "demarcation_metadata_file"
-        metadata_value = subprocess.check_output('cat %s'%(metadata_file),shell=True).strip()
-        found=False
+    def get_raw_data_files(self,demarcation):
+        ''' Get the raw data files in the order they were written, archived files first '''
+        try:
+            demarcation_date=datetime.datetime.strptime(demarcation.split('_')[0], "%d-%m-%y").date()
+        except ValueError:
+            demarcation_date=None
+        archived_files=[]
+        for f_name in os.listdir('archived_files/'):
+            if not f_name.startswith('iqtrace') or not f_name.endswith('.tar.gz'):
+                continue
+            try:
+                archive_time=datetime.datetime.strptime("_".join(f_name[:-len('.tar.gz')].split('_')[-2:]), "%d-%m-%Y_%H-%M-%S")
+            except ValueError:
+                logging.info("Archived file does not have the expected timestamp format.Hence skipping File: "+f_name)
+                continue
+            # Archive is created after the demarcation is written, so older archives cannot contain it
+            if demarcation_date and archive_time.date() < demarcation_date:
+                logging.info("Filtering out the archived files whose Timestamp is not within the expected range.Hence skipping File: "+f_name)
+                continue
+            archived_files.append((archive_time,'archived_files/'+f_name))
+        if not archived_files:
+            logging.info("No Files present in archived directory.")
+        current_files=[]
         for f_name in os.listdir('data_files/'):
-            if f_name.strip().startswith('iqtrace'):
-                f_name='data_files/'+f_name
-                demarcation_value_in_file=os.popen('grep -wf demarcation_metadata_file %s' %(f_name.strip())).read()
-                if demarcation_value_in_file:
-                    found = True
-                    file_found=f_name.strip()
-                    demarcation_found=metadata_value
-                    break
-                else:
+            if f_name.startswith('iqtrace'):
+                current_files.append((os.path.getmtime('data_files/'+f_name),'data_files/'+f_name))
+        return [f_name for _,f_name in sorted(archived_files)]+[f_name for _,f_name in sorted(current_files)]
+
+    def open_raw_data_file(self,raw_file,offset=0):
+        ''' Yield the readable logs of a raw data file positioned at offset, archived logs are read straight from the archive '''
+        if not raw_file.endswith('.tar.gz'):
+            with open(raw_file,'r') as infile:
+                infile.seek(offset)
+                yield raw_file,infile,offset
+            return
+        tar=tarfile.open(raw_file,'r:gz')
+        try:
+            # Offsets of an archive run across its logs in archive order
+            position=0
+            for member in tar:
+                if not member.isfile():
+                    continue
+                if position+member.size <= offset:
+                    position+=member.size
+                    continue
+                infile=tar.extractfile(member)
+                try:
+                    infile.seek(max(offset-position,0))
+                    yield raw_file+'/'+member.name,infile,max(offset,position)
+                finally:
+                    infile.close()
+                position+=member.size
+        finally:
+            tar.close()
+
+    def scan_demarcations(self,start,end,outfile):
+        ''' Single ordered pass over raw data files copying lines from start demarcation till end demarcation '''
+        demarcation_index=Demarcation_Index()
+        try:
+            found=self.scan_raw_data_files(start,end,outfile,demarcation_index,True)
+            if found is None:
+                logging.info("Demarcation offset index does not match the raw data files. Scanning the files from the beginning")
+                demarcation_index.clear()
+                found=self.scan_raw_data_files(start,end,outfile,demarcation_index,False)
+        finally:
+            demarcation_index.save()
+        return found
+
+    def scan_raw_data_files(self,start,end,outfile,demarcation_index,use_index):
+        ''' Scan raw data files resuming from the offsets in the index, returns None if the index is stale '''
+        start_marker="'"+start+"'"
+        file_containing_start_pattern=""
+        for raw_file in self.get_raw_data_files(start):
+            offset=0
+            resume_at_start=False
+            entry=demarcation_index.lookup(raw_file) if use_index and not file_containing_start_pattern else None
+            if entry:
+                if start in entry['markers']:
+                    offset=entry['markers'][start]
+                    resume_at_start=True
+                elif entry['complete'] and raw_file.endswith('.tar.gz'):
+                    logging.info("Archived file already scanned without start demarcation.Hence skipping File: "+raw_file)
                     continue
-        if not found:
-            output='archived_files/'
-            dir = os.listdir(output) 
-            if len(dir) != 0: 
-                demarcation_value_in_file=os.popen(''' zgrep -waf demarcation_metadata_file archived_files/* | awk -F: '{print $1}' | sort -u | awk -F / '{print $2}' ''').read()
-                
-                if demarcation_value_in_file:
-                    if demarcation_value_in_file.startswith('iqtrace'):
-                        found = True
-                        fname=demarcation_value_in_file
-                        file_found='archived_files/'+demarcation_value_in_file
-                        demarcation_found=metadata_value
-                        date_tz_file=fname.split('_')[-2]
-                        time_tz_file=fname.split('_')[-1].split('.')[0]
-                        today_date=date.today()
-                        # flag check so that untarring is done only once
-                        if self.flag == 0:
-                            if os.path.exists(temp_folder+'/untar/'):
-                                shutil.rmtree(temp_folder+'/untar/')
-                            start = datetime.datetime.strptime(date_tz_file, "%d-%m-%Y")
-                            end =datetime.datetime.strptime( today_date.strftime("%d-%m-%Y"),"%d-%m-%Y")
-                            dates_range = (start + datetime.timedelta(days=x) for x in range(0, (end-start).days+1))
-                            for date_object in dates_range:
-                                for file in os.listdir(output):
-                                    if file.strip().startswith('iqtrace'):
-                                        if date_object.strftime("%d-%m-%Y")  == file.split('_')[-2]:
-                                            if file.split('_')[-2] == date_tz_file and file.split('_')[-1].split('.')[0] < time_tz_file or file.split('_')[-2] < date_tz_file:
-                                                logging.info("Filtering out the archived files whose Timestamp is not within the expected range.Hence skipping File: "+str(file))
-                                                continue
-                                            else:
-                                                logging.info("Archive File Found whose Date/Time is within the expected range.Hence untarring the archived File: "+str(file))
-                                                #print('extract'+file)
-                                                out=temp_folder+'/untar'
-                                                tar = tarfile.open(output+file.strip('\n'))
-                                                tar.extractall(path=out)       
-                                                self.flag=1
-                                                #os.system('ls -larth /eniq/backup/counter_parse_tmp/untar')
-            else:
-                logging.info("No Files present in archived directory.")
-
-        if not found:
-            if os.path.isfile('demarcation_metadata_file_copy'):
-                logging.info("Copying back previous instance as no required demarcation found in log.")
-                os.system('cp demarcation_metadata_file_copy demarcation_metadata_file')
-            metadata_file = "demarcation_metadata_file"
-            metadata_value = subprocess.check_output('cat %s'%(metadata_file),shell=True).strip()
-            if metadata_value.endswith('_demarcation_1'):
-                if not os.path.exists(flag_file):
-                    with open(file_containing_start_pattern.strip()) as infile, open(outputfile, 'a') as outfile:
-                        copy = True
-                        for line in infile:
-                            if self.start_found in line:
-                                print('Found start '+ str(file_containing_start_pattern.strip()))
-                                copy = False
-                                outfile.write(line)
-                                open(flag_file, 'a').close() # touch file. as execute only 1st time
-                                new=outputfile[:-1]+'0'
-                                os.rename(outputfile,new)
-                                logging.info("Successfully parsed data from Start of the file to the Start Demarcation. Parsed output file in "+new)
-                                # save parse 1 output file in temp location
-                                parsing_level_1_output = open(temp_work_dir+"/parse_1_output", "w")
-                                parsing_level_1_output.write(new)
-                                parsing_level_1_output.close()
-                                # Cleanup
-                                if os.path.exists(temp_folder):
-                                    shutil.rmtree(temp_folder)
-                                sys.exit()
-                            else:
-                                outfile.write(line)
                 else:
-                    logging.info("No End Demarcation present.Does not require parsing from start of the file for this subsequent first instance. ")
-
-                    # Cleanup
-                    if os.path.exists(temp_folder):
-                        shutil.rmtree(temp_folder)
-                    sys.exit()
-
-            print "\33[31m{}\033[0m".format("Demarcation not found")
-            logging.error("Demarcation not found")
-
-            # Cleanup
-            if os.path.exists(temp_folder):
-                shutil.rmtree(temp_folder)
-
-            exit(1)
-
-        return demarcation_found,file_found
-
-
+                    # Only the data written since the last run is new
+                    offset=entry['scanned']
+            markers={}
+            scanned=offset
+            complete=False
+            raw_logs=self.open_raw_data_file(raw_file,offset)
+            try:
+                for source,infile,position in raw_logs:
+                    logging.info("Parsing file :"+source+" from offset "+str(position))
+                    for line in infile:
+                        if resume_at_start:
+                            resume_at_start=False
+                            if start_marker not in line:
+                                return None
+                        if '_demarcation_' in line:
+                            for marker_name in Demarcation_Index.demarcation_pattern.findall(line):
+                                markers.setdefault(marker_name,position)
+                        position+=len(line)
+                        if line.endswith('\n'):
+                            scanned=position
+                        if file_containing_start_pattern:
+                            outfile.write(line)
+                            if end in line:
+                                logging.info('Found End in '+source)
+                                return file_containing_start_pattern,source
+                        elif start_marker in line:
+                            logging.info('Found start in '+source)
+                            file_containing_start_pattern=source
+                            outfile.write(line)
+                complete=True
+            finally:
+                raw_logs.close()
+                demarcation_index.update(raw_file,scanned,complete,markers)
+        return file_containing_start_pattern,""
+
+    def parse_instance_zero(self):
+        ''' Parse from start of the file till the first demarcation, executed only for first instance '''
+        file_containing_start_pattern=sys.argv[4]
+        with open(file_containing_start_pattern.strip()) as infile, open(outputfile, 'a') as outfile:
+            for line in infile:
+                outfile.write(line)
+                if self.start_found in line:
+                    print('Found start '+ str(file_containing_start_pattern.strip()))
+                    break
+        open(flag_file, 'a').close() # touch file. as execute only 1st time
+        new=outputfile[:-1]+'0'
+        os.rename(outputfile,new)
+        logging.info("Successfully parsed data from Start of the file to the Start Demarcation. Parsed output file in "+new)
+        # save parse 1 output file in temp location
+        parsing_level_1_output = open(temp_work_dir+"/parse_1_output", "w")
+        parsing_level_1_output.write(new)
+        parsing_level_1_output.close()
 
+    def demarcation_not_found(self,message):
+        ''' Report missing demarcation and exit '''
+        print "\33[31m{}\033[0m".format(message)
+        logging.error(message)
+        exit(1)
 
     def parse_level_1(self):
         """
-            Parsing between demarcation post collecting information of start and end demarcation
+            Parsing between demarcation in a single pass over the current and archived raw data files
         """
-        print time.strftime("%d-%m-%Y_%H:%M:%S")+" : Get start demarcation from raw data files"
-        self.flag=0
-        self.start_found,file_containing_start_pattern=self.get_start_end()
-        if not self.start_found or not file_containing_start_pattern:
-            print "\33[31m{}\033[0m".format("No demarcation present in the logs ")
-            logging.error("No demarcation present in the collected current and archive logs.")
-            # Cleanup
-            if os.path.exists(temp_folder):
-                shutil.rmtree(temp_folder)
-            exit(1)
-          
-        if file_containing_start_pattern:
-            if file_containing_start_pattern.strip().endswith("tar.gz"): # check if file had format .tar.gz
-                logging.info("Start demarcation is present in archived file:"+file_containing_start_pattern.strip())
-                tar_start_file=file_containing_start_pattern
-                s=file_containing_start_pattern
-                os.chdir(sys.argv[1])
-                logging.info("Untarring the file..... ")
-                os.system('rm -rf /eniq/backup/counter_parse_tmp/untar_file_s;mkdir -p /eniq/backup/counter_parse_tmp/untar_file_s;')
-                out=temp_folder+'/untar_file_s/'
-                tar = tarfile.open(s.strip('\n'))
-                tar.extractall(path=out)
-                cmd='''ls -larth /eniq/backup/counter_parse_tmp/untar_file_s| grep log| awk '{print $NF}' '''
-                file_containing_start_pattern=os.popen(cmd).read()
-                file_containing_start_pattern=out+file_containing_start_pattern
-                logging.info("Post Untarring, start demarcation present in :"+file_containing_start_pattern)
+        print time.strftime("%d-%m-%Y_%H:%M:%S")+" : Get start and end demarcation from raw data files"
+        self.start_found=self.get_metadata_value()
+        if not self.start_found:
+            self.demarcation_not_found("No demarcation present in the logs ")
 
-        logging.info("Start demarcation found :"+self.start_found)
-        logging.info("Start demarcation present in :"+file_containing_start_pattern)
         instance_end=int(self.start_found.split('_')[-1])
         instance_end+=1
         a="_".join(self.start_found.split('_')[:-1])  +'_'+ str(instance_end)
-        instance_end="".join(a.split())
+        end_read="".join(a.split())
 
-        os.system('rm -rf demarcation_metadata_file_copy;cp demarcation_metadata_file demarcation_metadata_file_copy;')
-        self.update_demark_file(instance_end)
-        logging.info("Updated the demarcation file with next instance: "+instance_end)
-     
-        print time.strftime("%d-%m-%Y_%H:%M:%S")+" : Get end demarcation from raw data files\n"
-        end_read,file_containing_end_pattern=self.get_start_end()
-        if file_containing_end_pattern:
-            if file_containing_end_pattern.strip().endswith("tar.gz"):
-                logging.info("End demarcation is present in archived file:"+file_containing_end_pattern.strip())
-                s=file_containing_end_pattern
-                os.system('rm -rf /eniq/backup/counter_parse_tmp/untar_file_e;mkdir -p /eniq/backup/counter_parse_tmp/untar_file_e;')
-                out=temp_folder+'/untar_file_e/'
-                tar = tarfile.open(s.strip('\n'))
-                tar.extractall(path=out)
-                cmd='''ls -larth /eniq/backup/counter_parse_tmp/untar_file_e| grep log| awk '{print $NF}' '''
-                file_containing_end_pattern=os.popen(cmd).read()
-                file_containing_end_pattern=out+file_containing_end_pattern
-                logging.info("Post Untarring, end demarcation present in :"+file_containing_end_pattern)
-        logging.info("End demarcation found :"+end_read)
-        logging.info("End demarcation present in :"+file_containing_end_pattern)
+        with open(outputfile, 'a') as outfile:
+            file_containing_start_pattern,file_containing_end_pattern=self.scan_demarcations(self.start_found,end_read,outfile)
+
+        if not file_containing_start_pattern:
+            os.remove(outputfile)
+            if os.path.isfile('demarcation_metadata_file_copy'):
+                logging.info("Copying back previous instance as no required demarcation found in log.")
+                os.system('cp demarcation_metadata_file_copy demarcation_metadata_file')
+            self.demarcation_not_found("Demarcation not found")
 
-        if file_containing_start_pattern.strip() != file_containing_end_pattern.strip():
-            logging.info("Start and End demarcation is not present in the same file.")
-            logging.info("File with Start demarcation:"+file_containing_start_pattern.strip())
-            logging.info("File with End demarcation:"+file_containing_end_pattern.strip())
-            files=[file_containing_start_pattern.strip(),file_containing_end_pattern.strip()]
-            if 'data_files' not in file_containing_start_pattern.strip() or 'data_files' not in file_containing_end_pattern.strip():
-                _start_=file_containing_start_pattern.split('/')[-1]
-                _end_=file_containing_end_pattern.split('/')[-1]
-
-                untar_temp_dir='/eniq/backup/counter_parse_tmp/untar'
-                dir = os.listdir(untar_temp_dir) 
-                if len(dir) == 0: 
-                    logging.info("No untarred files present in temporary tar directory")
-                    if os.path.exists(temp_folder):
-                        shutil.rmtree(temp_folder)
-                    sys.exit()
+        logging.info("Start demarcation found :"+self.start_found)
+        logging.info("Start demarcation present in :"+file_containing_start_pattern)
+        os.system('rm -rf demarcation_metadata_file_copy;cp demarcation_metadata_file demarcation_metadata_file_copy;')
+        self.update_demark_file(end_read)
+        logging.info("Updated the demarcation file with next instance: "+end_read)
+
+        if not file_containing_end_pattern:
+            os.remove(outputfile)
+            logging.info("Copying back previous instance as no required demarcation found in log.")
+            os.system('cp demarcation_metadata_file_copy demarcation_metadata_file')
+            if self.start_found.endswith('_demarcation_1'):
+                if not os.path.exists(flag_file):
+                    self.parse_instance_zero()
                 else:
-                    logging.info("Tarred files present in temporary tar directory:"+str(dir))
-
-                #get the file list in numbered format
-                subprocess.check_output('''rm -rf /eniq/backup/counter_parse_tmp/file_list;a=0;for i in `ls -larth /eniq/backup/counter_parse_tmp/untar  | grep -E "root|dcuser" |  awk '{print $NF}'`;do a=`expr $a + 1`; echo $a,$i >> /eniq/backup/counter_parse_tmp/file_list; done;sed -i '/\,\./d' /eniq/backup/counter_parse_tmp/file_list''', shell=True)
-                with open('/eniq/backup/counter_parse_tmp/file_list') as f:
-                    for fn in f:
-                        #if start and end file both in archived OR only start file in archived
-                        if 'data_files' not in file_containing_start_pattern.strip() and 'data_files' not in file_containing_end_pattern.strip():
-
-                            if  _start_ in fn:
-                                start_file=fn.split(',')[0]
-                            elif _end_ in fn:
-                                end_file=fn.split(',')[0]
-                        elif 'data_files' not in file_containing_start_pattern.strip():
-                            if  _start_ in fn:
-                                start_file=fn.split(',')[0]
-                                with open('/eniq/backup/counter_parse_tmp/file_list') as f:
-                                    last_line=f.readlines()[-1]
-                                    end_file=int(last_line.strip().split(',')[0])
-                                    end_file+=1
-                        else:
-                            print 'Demarcation not found in archive file'
-
-                #get the between files
-                _command_=''' rm -rf /eniq/backup/counter_parse_tmp/between_files;cat /eniq/backup/counter_parse_tmp/file_list | awk -v a=%s -v b=%s '{if((NR> a )&&(NR< b  )) print}' | awk -F, '{print$2}' > /eniq/backup/counter_parse_tmp/between_files''' % (start_file,end_file)
-                subprocess.check_output(_command_, shell=True)
-                file_present_in_between = os.path.isfile('/eniq/backup/counter_parse_tmp/between_files')
-                if file_present_in_between:
-                    total_files=[]
-                    with open('/eniq/backup/counter_parse_tmp/between_files') as f:
-                        for line in f:
-                            total_files.append(temp_folder+'/untar/'+line.strip('\n'))
-                    final_files=files[:1] + total_files + files[-1:]
-                    if 'data_files' not in file_containing_start_pattern.strip() and 'data_files' not in file_containing_end_pattern.strip():
-                        final_files=files[:1] + total_files + files[-1:]
-                    else:
-                        for fname in os.listdir('data_files/'):
-                            if fname.endswith('.old'):
-                                final_files.insert(-1,'data_files/'+fname)
-            else:
-                final_files=files
-            logging.info("Total files considered from Start Demarcation to End Demarcation:"+str(final_files))
-            copy = False
-            for file in final_files:
-                logging.info("Parsing file :"+file)
-                with open(file.strip()) as infile, open(outputfile, 'a') as outfile:
-                    for line in infile:
-                        if "'"+self.start_found+"'" in line:
-                            logging.info('Found start in '+file)
-                            copy = True
-                            outfile.write(line)
-                            continue
-                        elif end_read in line:
-                            copy = False
-                            logging.info('Found End in '+file)
-                            outfile.write(line)
-                            logging.info("Successfully parsed data from Start Demarcation to End Demarcation. Parsed output file in "+outputfile+"\n")
-                            break
-                        elif copy:
-                            outfile.write(line)
+                    logging.info("No End Demarcation present.Does not require parsing from start of the file for this subsequent first instance. ")
+                sys.exit()
+            self.demarcation_not_found("Demarcation not found")
 
-        else:
-            with open(file_containing_start_pattern.strip()) as infile, open(outputfile, 'a') as outfile:
-                logging.info("Parsing file :"+str(file_containing_start_pattern.strip()))
-                copy = False
-                for line in infile:
-                    if "'"+self.start_found+"'" in line:
-                        logging.info('Found start in '+ str(file_containing_start_pattern.strip()))
-                        copy = True
-                        outfile.write(line)
-                        continue
-                    elif end_read in line:
-                        copy = False
-                        logging.info('Found End in '+ str(file_containing_start_pattern.strip()))
-                        outfile.write(line)
-                        logging.info("Successfully parsed data from Start Demarcation to End Demarcation. Parsed output file in "+outputfile+"\n")
-                        break
-                    elif copy:
-                        outfile.write(line)
+        logging.info("End demarcation found :"+end_read)
+        logging.info("End demarcation present in :"+file_containing_end_pattern)
+        logging.info("Successfully parsed data from Start Demarcation to End Demarcation. Parsed output file in "+outputfile+"\n")
+
+
+class Parsed_Output_Writer:
+
+    ''' Buffers parsing level 2 rows and query status, writing them to file in batches '''
+
+    def __init__(self,batch_size=500):
+        self.batch_size=batch_size
+        self.query_rows=[]
+        self.parsed_rows=[]
+        self.parsed_lines=[]
+        self.failed_lines=[]
+
+    def add_row(self,row):
+        ''' Add a row of the query being parsed '''
+        self.query_rows.append(row)
+
+    def commit_query(self,parsed_line):
+        ''' Mark the query being parsed as parsed along with its rows '''
+        self.parsed_rows.extend(self.query_rows)
+        self.parsed_lines.append(parsed_line)
+        self.query_rows=[]
+        if len(self.parsed_lines)+len(self.failed_lines) >= self.batch_size:
+            self.flush()
+
+    def fail_query(self,failed_line):
+        ''' Mark the query being parsed as failed, dropping its rows '''
+        self.failed_lines.append(failed_line)
+        self.query_rows=[]
+        if len(self.parsed_lines)+len(self.failed_lines) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        ''' Write the committed queries, the metadata is written last as checkpoint of the rows written '''
+        if self.parsed_rows:
+            with open(parsed_output_file,'a') as parse_level2_file:
+                parse_level2_file.write("".join(self.parsed_rows))
+        if self.failed_lines:
+            with open(temp_failed_metadata_file,'a') as temp_failed_queries_file:
+                temp_failed_queries_file.write("".join(self.failed_lines))
+        if self.parsed_lines:
+            with open(parsed_metadata_file,'a') as metadata_file_after:
+                metadata_file_after.write("".join(self.parsed_lines))
+        self.parsed_rows=[]
+        self.parsed_lines=[]
+        self.failed_lines=[]
 
 
 class Parsing_Level_2:
@@ -360,14 +687,11 @@ class Parsing_Level_2:
                     f3.write(line3)
                     count+=1
 
-    def fetch_select_query(self,_count_):
+    def fetch_select_query(self,_count_,queries):
         ''' Create the metadata file from the collected select queries to track the parsing '''
-        print time.strftime("%d-%m-%Y_%H:%M:%S")+" : Creating metadata file to track parsing {}".format(temp_query_breakdown_metadata)
         logging.info("Creating metadata file to track parsing {}".format(temp_query_breakdown_metadata))
-        with open(input_file, 'r') as file, open(temp_query_breakdown_metadata, 'a') as metadata_file, open(tables_to_be_included, 'r') as tables_list_file:
-            global _tables_
-            _tables_=tables_list_file.read().splitlines()
-            for line in file.readlines():
+        with open(temp_query_breakdown_metadata, 'a') as metadata_file:
+            for line in queries:
                 string_split=line.split(",")
                 _is_digit_=bool(re.match('^[0-9]+$', string_split[4]))
                 if _is_digit_:
@@ -389,89 +713,66 @@ class Parsing_Level_2:
         else:
             _table_type_="VIEW"
         _date_=time.strftime("%d-%m-%Y")
-        with open(temp_parsed_output_file,'a') as temp_parse_level2_file:
-            temp_parse_level2_file.write(table_name.strip('\n')+"::"+_table_type_+"::"+pm_counterName.strip('\n')+"::"+_date_+"\n")
+        parsed_output_writer.add_row(table_name.strip('\n')+"::"+_table_type_+"::"+pm_counterName.strip('\n')+"::"+_date_+"\n")
 
 
     def get_multiple_select_queries(self,_line1_):
         ''' Segregate joint select queries in single query '''
-        match_count=len(re.findall("select", _line1_))
-        i=1
-        index_value=0
-        index_list=[]
-        while i <= match_count:
-            _index_=_line1_.find("select", index_value)
-            index_list.append(_index_)
-            index_value=_index_ + 1
-            i+=1
-        length=len(index_list)
-        select_list=[]
-        if length > 1:
-            l=0
-            while l < length:
-                if l == (length - 1):
-                    a=index_list[l]
-                    select_query=_line1_[a:].strip()
-                else:
-                    a, b=index_list[l], index_list[l+1]
-                    select_query=_line1_[a:b].strip()
-                select_list.append(select_query)
-                l+=1
-        else :
-            select_list.append(_line1_)
-        return select_list
+        return tokenizer.split_selects(_line1_)
 
     def get_table_name(self,rawList_1):
         ''' Get the table name in the query '''
-        tab_name=""
-        for _char_ in ['"','dc.','dim.','\'','(',')','dcpublic.','dcbo.']:
-            if _char_ in rawList_1:
-                rawList_1=rawList_1.replace(_char_, '')
-        rawList_2=rawList_1.strip().split()
-        for t_name in rawList_2:
-            if any(t in t_name for t in _tables_) and all(tab not in t_name for tab in tables_to_exclude):
-                tab_name=t_name.upper().strip()
-                return tab_name
-
-    def get_table_specific_counters(self,master_file_list,table_name):
-        table_specific_counters=[]
-        for master_data in master_file_list:
-            tp_name=master_data.split('::')[0]
-            if tp_name.upper() in table_name:
-                counterName=master_data.split('::')[1]
-                table_specific_counters.append(counterName)
-        return table_specific_counters
+        for t_name in tokenizer.table_name_tokens(rawList_1).strip().split():
+            if tokenizer.is_table(t_name):
+                return t_name.upper().strip()
+
+    def get_table_specific_counters(self,table_name):
+        ''' Get the lower case counter names of the table from master file '''
+        return master_index.get_counters(table_name)
+
+    def get_last_counter(self,text,table_specific_counters):
+        ''' Get the last word of text which is a counter of the table '''
+        pm_counterName=""
+        for item_sep in text.split():
+            if item_sep in table_specific_counters:
+                pm_counterName=item_sep
+        return pm_counterName
+
+    def load_parsing_data(self):
+        ''' Load the table and counter lookups once so that every batch worker shares them '''
+        print time.strftime("%d-%m-%Y_%H:%M:%S")+" : Loading table and counter details for parsing"
+        logging.info("Loading table and counter details for parsing")
+        with open(tables_to_be_included, 'r') as tables_list_file, open(counter_names_file,'r') as counters_info_file, open(all_columns_names_file,'r') as all_columns_info_file:
+            global _tables_
+            _tables_=tables_list_file.read().splitlines()
+            global counter_names
+            counter_names=Substring_Lookup(c.lower() for c in counters_info_file.read().splitlines())
+            global all_columns_names
+            all_columns_names=Substring_Lookup(nc.lower() for nc in all_columns_info_file.read().splitlines())
+        global master_index
+        master_index=Master_Index(master_file)
+        global tables_to_exclude
+        tables_to_exclude=['dc_z_alarm', 'dc_e_bulk_cm', 'dim_']
+        global tokenizer
+        tokenizer=Query_Tokenizer(_tables_,tables_to_exclude)
 
     def parse_tables_counters(self):
         ''' Parsing getched queries further to get table and counter information '''
-        print time.strftime("%d-%m-%Y_%H:%M:%S")+" : Parsing Tables and PM counters from select queries"
         logging.info("Parsing Tables and PM counters from select queries")
-        with open(temp_query_breakdown_metadata,'r') as metadata_file, open(counter_names_file,'r') as counters_info_file, open(all_columns_names_file,'r') as all_columns_info_file, open(master_file,'r') as master_file_for_counters_info:
-            counter_names_list=counters_info_file.read().splitlines()
-            all_columns_names_list=all_columns_info_file.read().splitlines()
-            master_file_list=master_file_for_counters_info.read().splitlines()
+        with open(temp_query_breakdown_metadata,'r') as metadata_file:
             global failed_queries
             failed_queries=0
-            global tables_to_exclude
-            tables_to_exclude=['dc_z_alarm', 'dc_e_bulk_cm', 'dim_']
+            select_star=['select *', 'select count*', 'select count']
+            keywords=['case', 'when']
 
             for _lines_ in metadata_file.readlines():
                 _line_=_lines_.split("::")[1]
                 _line1_=_line_.lower()
                 invalid_column=0
                 invalid_column_list=[]
-                # Clean temporary parsed output file for new query
-                if os.path.exists(temp_parsed_output_file):
-                    os.remove(temp_parsed_output_file) 
 
                 # segregate if joint select queries are present
-                select_list_1=self.get_multiple_select_queries(_line1_)
-                select_list_2=[]
-                for item in select_list_1:
-                    for ch in ['partitions','"','union ','union all','all ','\'','and ','sum(','min(','max(','avg(','if(','if ','(',')']:
-                        if ch in item:
-                            item=item.replace(ch, '')
-                    select_list_2.append(item)
+                select_list_2=[tokenizer.query_tokens(item) for item in self.get_multiple_select_queries(_line1_)]
                 select_unique=[]
                 for query in select_list_2:
                     flag=0
@@ -488,8 +789,6 @@ class Parsing_Level_2:
                                         break
                                 if flag == 0:
                                     select_unique.append(query)
-                            else:
-                                continue
 
                 # Parse the segregated queries one by one
                 for _line_1_ in select_unique:
@@ -498,239 +797,128 @@ class Parsing_Level_2:
                     pm_counterName=""
 
                     # To handle "select *" and "select count(*)" queries
-                    select_star=['select *', 'select count*', 'select count']
-                    #select_top=['select top', '*']
-                    select_top=bool(re.match(r'select top \d+\ \*',_line_1_))
-                    #if any(k in _line_1_ for k in select_star) or all(st in _line_1_ for st in select_top):
-                    if any(k in _line_1_ for k in select_star) or select_top:
-                        counter_flag=1
+                    if any(k in _line_1_ for k in select_star) or tokenizer.select_top_pattern.match(_line_1_):
                         ''' --- Select * and Select count(*) handling --- '''
                         pm_counterName="ALL"
-                        c, d = _line_1_.find("from "), _line_1_.find("where")
-                        # getting the position of 'select' and from to get the counters
-                        if d == -1:
-                            rawList_1=_line_1_[c + 5:].strip()
-                        else:
-                            rawList_1=_line_1_[c + 5:d].strip()
-                        for _char_ in ['"','dc.','dim.','\'','and ','min(','max(','avg(','sum(','dcpublic.','dcbo.','(',')']:
-                            if _char_ in rawList_1:
-                                rawList_1=rawList_1.replace(_char_, '')
-                        rawList_2=rawList_1.strip().split(',')
-                        for t_name in rawList_2:
-                            rawList_3=t_name.strip().split()
-                            for tab_name in rawList_3:
+                        rawList_1=tokenizer.table_tokens(tokenizer.from_clause(_line_1_))
+                        for t_name in rawList_1.strip().split(','):
+                            for tab_name in t_name.strip().split():
                                 table_name=tab_name.upper().strip()
-                                if any(t.upper() in table_name for t in _tables_) and all(tab.upper() not in table_name for tab in tables_to_exclude):
-                                    for master_data in master_file_list:
-                                        tp_name=master_data.split('::')[0]
-                                        if tp_name.upper() in table_name:
-                                            # To update counter name in temporary parsed file
-                                            self.check_table_type(table_name, pm_counterName)
-                                            break
-                                else:
-                                    continue
+                                if tokenizer.is_table_upper(table_name) and master_index.has_table(table_name):
+                                    # To update counter name in temporary parsed file
+                                    self.check_table_type(table_name, pm_counterName)
+                        continue
+
+                    ''' --- Generic Select query handling --- '''
+                    # getting the table name with alias name
+                    alias_flag=0
+                    rawList_1=tokenizer.from_clause(_line_1_)
+                    if "as" in rawList_1:
+                        alias_flag=1
+                        rawList_1=tokenizer.alias_table_tokens(rawList_1)
+                        tableList=rawList_1.split(",")
+                    #Get the text from "select" to "from" to find pm counters
+                    counterList_1=tokenizer.counter_tokens(tokenizer.select_clause(_line_1_)).split(",")
+
+                    # Eliminate the multipliers e.g. 0.08*<counter/table name>
+                    eliminate_dec=[]
+                    for item_list in counterList_1:
+                        eliminate_dec.extend(tokenizer.decimal_pattern.findall(item_list))
+                    if not eliminate_dec:
+                        counterList=counterList_1
                     else:
-                        ''' --- Generic Select query handling --- '''
-                        # getting the table name with alias name
-                        alias_flag=0
-                        c, d = _line_1_.find("from "), _line_1_.find("where")
-                        if d == -1:
-                            rawList_1=_line_1_[c + 5:].strip()
-                        else:
-                            rawList_1=_line_1_[c + 5:d].strip()
-                        if "as" in rawList_1:
-                            tableList=[]
-                            alias_flag=1
-                            for _char_ in ['"','dc.','dim.','\'', 'as ','and ','min(','max(','avg(','sum(','dcpublic.','dcbo.','(',')']:
-                                if _char_ in rawList_1:
-                                    rawList_1=rawList_1.replace(_char_, '')
-                            tableList=rawList_1.split(",")
-                        #Get the index of "select" to "from" to find pm counters
-                        a, b = _line_1_.find('select '), _line_1_.find('from')
-                        rawList=_line_1_[a + 7:b].strip()
-                        for ch in ['distinct ','distinct(','"','sum(','dc.','dim.','*','as ','\'','if(','if ','count ','count(','results ','result ','and ','min(','max(','avg(','dcpublic.','dcbo.','(',')',' in ',' else ','ifnull','null','/','yyyy-mm-dd','e2e--mme','-','{','}',' end','substring','charindex','then ']:
-                            if ch in rawList:
-                                if ch == "*" or ch == " in " or ch == "null" or ch == "then ":
-                                    rawList=rawList.replace(ch, ' ')
-                                elif ch == " else " or ch == "-" or ch == "/" or ch == "ifnull":
-                                    rawList=rawList.replace(ch, ',')
-                                else:
-                                    rawList=rawList.replace(ch, '')
-                        counterList_1=rawList.split(",")
                         counterList=[]
-                        eliminate_dec=[]
-
-                        # Eliminate the multipliers e.g. 0.08*<counter/table name>
-                        r1=re.compile(r'\d+\.\d+')
-                        exclude_decimal_1=list(filter(r1.findall, counterList_1))
-                        if len(exclude_decimal_1) == 0:
-                            counterList=counterList_1
+                        for item_list in counterList_1:
+                            for elim_dec in eliminate_dec:
+                                if elim_dec in item_list.strip():
+                                    item_list=item_list.strip().replace(elim_dec, '')
+                            counterList.append(item_list.strip())
+
+                    # In case, aliases are assigned for tables without using "as" keyword
+                    if alias_flag == 0 and any("." in alias_nm for alias_nm in counterList):
+                        tableList=[]
+                        for alias_nm in counterList:
+                            if "." in alias_nm and any(raw_item in alias_nm for raw_item in rawList_1) and not tokenizer.tables_pattern.search(alias_nm):
+                                alias_flag=1
+                                rawList_1=tokenizer.alias_table_tokens(rawList_1)
+                                if rawList_1 not in tableList:
+                                    tableList=rawList_1.split(",")
+
+                    # Check if invalid_counter is present in the query
+                    for item in counterList:
+                        if all(k in item.strip() for k in keywords):
+                            continue
+                        elif all_columns_names.contains(item.strip()):
+                            continue
+                        elif item.strip().isdigit() or not item.strip():
+                            continue
                         else:
-                            for exc_dec in exclude_decimal_1:
-                                exclude_decimal=re.findall(r'\d+\.\d+',exc_dec)
-                                for excl_int in exclude_decimal:
-                                    eliminate_dec.append(excl_int)
-                            for item_list in counterList_1:
-                                for elim_dec in eliminate_dec:
-                                    if elim_dec in item_list.strip():
-                                        item_list=item_list.strip().replace(elim_dec, '')
-                                counterList.append(item_list.strip())
-
-                        # In case, aliases are assigned for tables without using "as" keyword
-                        #r2=re.compile(r'd\d+\.')
-                        r2=re.compile(r'\.')
-                        alias_name=list(filter(r2.findall, counterList))
-                        if len(alias_name) > 0 and alias_flag == 0 :
-                            tableList=[]
-                            for alias_nm in alias_name:
-                                if any(raw_item in alias_nm for raw_item in rawList_1) and all(t not in alias_nm for t in _tables_):
-                                    alias_flag=1
-                                    for _char_ in ['"','dc.','dim.','\'', 'as ','and ','min(','max(','avg(','sum(','dcpublic.','dcbo.','(',')']:
-                                        if _char_ in rawList_1:
-                                            rawList_1=rawList_1.replace(_char_, '')
-                                    if rawList_1 not in tableList:
-                                        tableList=rawList_1.split(",")
-
-                        keywords=['case', 'when']
-                        # Check if invalid_counter is present in the query
-                        for item in counterList:
-                            if all(k in item.strip() for k in keywords):
-                                continue
-                            elif any(nc.lower() in item.strip() for nc in all_columns_names_list):
-                                continue
-                            elif item.strip().isdigit() or not item.strip():
+                            if all(tab not in rawList_1 for tab in tables_to_exclude):
+                                invalid_column=1
+                                invalid_column_list.append(item)
+
+                    for item in counterList:
+                        if "." in item.strip() and "+" in item.strip():
+                            i=counterList.index(item)
+                            counterList[i]=item.strip().replace('+',' ')
+                    if invalid_column == 1:
+                        continue
+
+                    # Parse further to collect counter and table names
+                    for item in counterList:
+                        if not counter_names.contains(item.strip()) or all(k in item.strip() for k in keywords):
+                            continue
+                        elif "+" in item.strip():
+                            # Get Table name from query
+                            table_name=self.get_table_name(rawList_1)
+                            if not table_name:
+                                break
+
+                            # Fetch table specific counter list from master file
+                            table_specific_counters=self.get_table_specific_counters(table_name)
+                            for i in item.strip().split("+"):
+                                for i_sep in i.split():
+                                    if i_sep in table_specific_counters:
+                                        # To update counter name in temporary parsed file
+                                        self.check_table_type(table_name, i_sep)
+                        elif "." in item.strip():
+                            table_name=""
+                            ''' Multiple Table scenario '''
+                            temp_list=item.split(".")
+                            # Reading Alias used for Table Name
+                            for alias_name in temp_list[0].split():
+                                if alias_flag == 1 and not tokenizer.tables_pattern.search(alias_name) and not tokenizer.exclude_pattern.search(alias_name):
+                                    for alias_ in tableList:
+                                        if alias_name in alias_:
+                                            table_name=alias_.strip().split()[0].upper().strip()
+                                elif tokenizer.exclude_pattern.search(alias_name):
+                                    table_name="exclude_table"
+                                elif tokenizer.tables_pattern.search(alias_name):
+                                    table_name=alias_name.upper().strip()
+                            if table_name == "exclude_table":
                                 continue
-                            else:
-                                if all(tab not in rawList_1 for tab in tables_to_exclude):
-                                    invalid_column=1
-                                    invalid_column_list.append(item)
-
-                        for item in counterList:
-                            if "." in item.strip() and "+" in item.strip():
-                                i=counterList.index(item)
-                                counterList[i]=item.strip().replace('+',' ')
-                        if invalid_column == 0:
-                            # Parse further to collect counter and table names
-                            for item in counterList:
-                                counter_present=0
-                                if any(c.lower() in item.strip() for c in counter_names_list):
-                                    #counter_flag=1
-                                    if all(k in item.strip() for k in keywords):
-                                        continue
-                                    elif "+" in item.strip():
-                                        # Get Table name from query
-                                        table_name=self.get_table_name(rawList_1)
-                                        if not table_name:
-                                            no_table=1
-                                            break
-
-                                        # Fetch table specific counter list from master file
-                                        table_specific_counters=self.get_table_specific_counters(master_file_list,table_name)
-
-                                        temp_list=item.strip().split("+")
-                                        for i in temp_list:
-                                            i_split=i.split()
-                                            for i_sep in i_split:
-                                                counter_present=0
-                                                if any(c.lower() in i_sep.strip() for c in table_specific_counters):
-                                                    temp_list_1=i_sep.strip().split()
-                                                    for temp in temp_list_1:
-                                                        counter_present=0
-                                                        if table_specific_counters:
-                                                            for cn in table_specific_counters:
-                                                                if cn.lower() == temp.strip():
-                                                                    pm_counterName=temp.strip()
-                                                                    counter_present=1
-                                                        else:
-                                                            break
-                                                        if counter_present:
-                                                            # To update counter name in temporary parsed file
-                                                            self.check_table_type(table_name, pm_counterName)
-                                                        else:
-                                                            continue
-                                                else:
-                                                    continue
-                                    elif "." in item.strip():
-                                        table_name=""
-                                        ''' Multiple Table scenario '''
-                                        temp_list=item.split(".")
-                                        # Reading Alias used for Table Name
-                                        space_sep_alias=temp_list[0].split()
-                                        for alias_name in space_sep_alias:
-                                            if alias_flag == 1 and all(t not in alias_name for t in _tables_) and all(tex not in alias_name for tex in tables_to_exclude):
-                                                for alias_ in tableList:
-                                                    if alias_name in alias_:
-                                                        table_alias=alias_.strip().split()
-                                                        table_name=table_alias[0].upper().strip()
-                                            else:
-                                                if any(tex in alias_name for tex in tables_to_exclude):
-                                                    table_name="exclude_table"
-                                                elif any(t in alias_name for t in _tables_):
-                                                    table_name=alias_name.upper().strip()
-                                        if table_name == "exclude_table":
-                                            continue
-                                        elif not table_name:
-                                            no_table=1
-                                            break
-
-                                        # Fetch table specific counter list from master file
-                                        table_specific_counters=self.get_table_specific_counters(master_file_list,table_name)
-
-                                        space_sep_counter=temp_list[1].split()
-                                        for item_sep in space_sep_counter:
-                                            if table_specific_counters:
-                                                for cn in table_specific_counters:
-                                                    if cn.lower() == item_sep.strip():
-                                                        pm_counterName=item_sep.strip()
-                                                        counter_present=1
-                                            else:
-                                                break
-
-                                        if counter_present:
-                                            if table_name:
-                                                # To update counter name in temporary parsed file
-                                                self.check_table_type(table_name, pm_counterName)
-                                                #break
-                                            else:
-                                                no_table=1
-                                                break
-                                        else:
-                                            continue
-                                    else:
-                                        # Get Table name from query
-                                        table_name=self.get_table_name(rawList_1)
-                                        if not table_name:
-                                            no_table=1
-                                            break
-
-                                        # Fetch table specific counter list from master file
-                                        table_specific_counters=self.get_table_specific_counters(master_file_list,table_name)
-
-                                        space_sep_counter=item.strip().split()
-                                        for item_sep in space_sep_counter:
-                                            if table_specific_counters:
-                                                for cn in table_specific_counters:
-                                                    if cn.lower() == item_sep.strip():
-                                                        ''' Single Table scenario '''
-                                                        pm_counterName=item_sep.strip()
-                                                        counter_present=1
-                                            else:
-                                                break
-
-                                        if counter_present:
-                                            if table_name:
-                                                # To update counter name in temporary parsed file
-                                                self.check_table_type(table_name, pm_counterName)
-                                                #break
-                                            else:
-                                                no_table=1
-                                                break
-                                        else:
-                                            continue
-                                else:
-                                    continue
-                                if no_table:
-                                    break
+                            elif not table_name:
+                                break
+
+                            # Fetch table specific counter list from master file
+                            table_specific_counters=self.get_table_specific_counters(table_name)
+                            pm_counterName=self.get_last_counter(temp_list[1],table_specific_counters)
+                            if pm_counterName:
+                                # To update counter name in temporary parsed file
+                                self.check_table_type(table_name, pm_counterName)
+                        else:
+                            # Get Table name from query
+                            table_name=self.get_table_name(rawList_1)
+                            if not table_name:
+                                break
+
+                            # Fetch table specific counter list from master file
+                            table_specific_counters=self.get_table_specific_counters(table_name)
+                            ''' Single Table scenario '''
+                            pm_counterName=self.get_last_counter(item,table_specific_counters)
+                            if pm_counterName:
+                                # To update counter name in temporary parsed file
+                                self.check_table_type(table_name, pm_counterName)
                 if invalid_column == 1:
                     failed_queries=1
                     failed_line=_lines_.replace('NOT PARSED', 'FAILED').strip("\n")
@@ -738,18 +926,178 @@ class Parsing_Level_2:
                     for column_ in invalid_column_list:
                         failed_line=failed_line+column_+" ,"
                     failed_line1=failed_line.strip(',')+"\n" 
-                    with open(temp_failed_metadata_file,'a') as temp_failed_queries_file:
-                        temp_failed_queries_file.write(failed_line1)
+                    parsed_output_writer.fail_query(failed_line1)
                 else:
-                    if os.path.exists(temp_parsed_output_file):
-                        with open(temp_parsed_output_file,'r') as temp_parse_level2_file, open(parsed_output_file,'a') as parse_level2_file:
-                            parse_output_list=temp_parse_level2_file.read().splitlines()
-                            for parsed_output in parse_output_list:
-                                parse_level2_file.write(parsed_output+"\n")
                     parsed_line=_lines_.replace('NOT PARSED', 'PARSED')
-                    with open(parsed_metadata_file,'a') as metadata_file_after:
-                        metadata_file_after.write(parsed_line)
-                time.sleep(0.1)
+                    parsed_output_writer.commit_query(parsed_line)
+                if query_throttle:
+                    time.sleep(query_throttle)
+            parsed_output_writer.flush()
+
+    def read_select_queries(self):
+        ''' Stream the select queries out of the parsing level 1 output file '''
+        select_pattern=re.compile(r"(?<![A-Za-z0-9_])select(?![A-Za-z0-9_])", re.IGNORECASE)
+        skip_pattern=re.compile(r"(?<![A-Za-z0-9_])(insert into|log_|delete from|update)(?![A-Za-z0-9_])", re.IGNORECASE)
+        with open(input_file,'r') as file:
+            for line in file:
+                if select_pattern.search(line) and not skip_pattern.search(line):
+                    yield line
+
+    def read_batches(self):
+        ''' Group the select queries into batches of no_of_rows_per_file queries '''
+        batch=[]
+        batch_no=1
+        for line in self.read_select_queries():
+            batch.append(line)
+            if len(batch) == no_of_rows_per_file:
+                yield batch_no, batch
+                batch=[]
+                batch_no+=1
+        if batch or (batch_no == 1 and os.path.exists(batch_files(1)[2])):
+            yield batch_no, batch
+
+    def parse_batch(self,batch_no,queries):
+        ''' Parse one batch of select queries and return PARSED, FAILED or ERROR '''
+        global parsed_output_file, temp_failed_metadata_file, temp_query_breakdown_metadata, parsed_metadata_file, not_parsed_queries
+        parsed_output_file, temp_failed_metadata_file, temp_query_breakdown_metadata, parsed_metadata_file, not_parsed_queries=batch_files(batch_no)
+        global parsed_output_writer
+        parsed_output_writer=Parsed_Output_Writer()
+        logging.info("------------------ Parsing Level 2 : Batch {} ------------------".format(batch_no))
+        try:
+            # Check for not parsed/failed queries from last run
+            query_count=self.check_metadata_file()
+            self.fetch_select_query(query_count,queries)
+            self.parse_tables_counters()
+        except:
+            # Keep the queries completed before the failure
+            parsed_output_writer.flush()
+            self.update_metadata_file()
+            logging.error("Issue encountered while parsing the table and counter details. Remaining select queries will be parsed in next run")
+            return "ERROR"
+        if failed_queries == 1:
+            # Take backup of the input of the batch in case of failure
+            with open(counter_tool_failed_dir+"/"+timeStr+"_input_file_"+str(batch_no),'w') as failed_input_file:
+                failed_input_file.writelines(queries)
+            return "FAILED"
+        return "PARSED"
+
+    def merge_batch(self,batch_no,status,output_file,not_parsed_list):
+        ''' Append the results of a finished batch to the level 2 output in batch order '''
+        batch_output_file, batch_failed_file, batch_breakdown_file, batch_metadata_file, batch_not_parsed_file=batch_files(batch_no)
+        if os.path.exists(batch_output_file):
+            with open(batch_output_file,'r') as infile:
+                shutil.copyfileobj(infile,output_file)
+        if status == "FAILED" and os.path.exists(batch_failed_file):
+            with open(batch_failed_file,'r') as temp_failed_queries_file, open(failed_metadata_file,'a') as failed_queries_file:
+                shutil.copyfileobj(temp_failed_queries_file,failed_queries_file)
+        if status == "ERROR" and os.path.exists(batch_not_parsed_file):
+            with open(batch_not_parsed_file,'r') as infile:
+                not_parsed_list.extend(line.split("::",1)[1] for line in infile)
+        for files in batch_files(batch_no):
+            if os.path.exists(files):
+                os.remove(files)
+
+    def parse_level_2(self):
+        ''' Fan the select query batches out to a pool of workers and merge the results in order '''
+        print time.strftime("%d-%m-%Y_%H:%M:%S")+" : Parsing Tables and PM counters from select queries"
+        logging.info("Parsing Tables and PM counters from select queries using {} worker(s)".format(no_of_threads))
+        self.load_parsing_data()
+
+        # Queries left from the last run are parsed along with the first batch
+        if os.path.exists(query_breakdown_metadata):
+            copy2(query_breakdown_metadata,batch_files(1)[2])
+            os.remove(query_breakdown_metadata)
+
+        status_list=[]
+        not_parsed_list=[]
+        pool=multiprocessing.Pool(no_of_threads)
+        pending=collections.deque()
+        try:
+            with open(output_file_path,'a') as output_file:
+                for batch_no, queries in self.read_batches():
+                    pending.append((batch_no, pool.apply_async(parse_level_2_batch, (batch_no, queries))))
+                    # Bound the number of batches held in memory
+                    while len(pending) > 2*no_of_threads:
+                        finished_batch_no, result=pending.popleft()
+                        status_list.append(result.get())
+                        self.merge_batch(finished_batch_no,status_list[-1],output_file,not_parsed_list)
+                while pending:
+                    finished_batch_no, result=pending.popleft()
+                    status_list.append(result.get())
+                    self.merge_batch(finished_batch_no,status_list[-1],output_file,not_parsed_list)
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+        if os.path.exists(output_file_path) and os.path.getsize(output_file_path) == 0:
+            os.remove(output_file_path)
+
+        if not_parsed_list:
+            with open(query_breakdown_metadata,'w') as outfile:
+                for count, line in enumerate(not_parsed_list, 1):
+                    outfile.write(str(count)+"::"+line)
+
+        if "FAILED" in status_list:
+            logging.error("Failed to parse few queries. Please find the failed queries in {}\n".format(failed_metadata_file))
+        if "FAILED" in status_list or "ERROR" in status_list:
+            exit(1)
+        logging.info("Parsing Level 2 completed successfully")
+
+class Parsing_Level_3:
+
+    ''' Parsing Level 3 class '''
+
+    def get_base_table(self,database_object):
+        ''' Strip the partition or view suffix from the database object to get the master file table '''
+        if database_object[-1:].isdigit():
+            return "_".join(database_object.split("_")[:-2])
+        return "_".join(database_object.split("_")[:-1])
+
+    def read_parsed_files(self):
+        ''' Count every table and counter pair of the parsing level 2 output files of the date in one pass '''
+        counter_count={}
+        all_count={}
+        for parsed_file in sorted(glob.glob(os.path.join(parsed_files_dir,date_to_find+"*"))):
+            with open(parsed_file,'r') as infile:
+                for line in infile:
+                    fields=line.rstrip('\n').split("::")
+                    if len(fields) < 3:
+                        continue
+                    database_object, counter_name=fields[0], fields[2]
+                    if counter_name == "ALL":
+                        all_count[database_object]=all_count.get(database_object,0)+1
+                    else:
+                        counters=counter_count.setdefault(database_object,{})
+                        counters[counter_name.lower()]=counters.get(counter_name.lower(),0)+1
+        return counter_count, all_count
+
+    def aggregate(self):
+        ''' Create the aggregated file with the count of each counter used on the date '''
+        logging.info("Getting count for individual counter for date - {}".format(date_to_find))
+        counter_count, all_count=self.read_parsed_files()
+        date_to_insert="-".join(reversed(date_to_find.split("-")))
+        master_index=None
+        rows=[]
+        for database_object in sorted(set(counter_count) | set(all_count)):
+            counters=counter_count.get(database_object,{})
+            aggregated=[[counter_name,counters[counter_name]] for counter_name in sorted(counters)]
+            # A select * query counts as a use of every counter of the table
+            if database_object in all_count:
+                if master_index is None:
+                    master_index=Master_Index(master_file)
+                positions=dict((row[0],row) for row in aggregated)
+                for counter_name in sorted(master_index.table_counters.get(self.get_base_table(database_object).upper(),())):
+                    if counter_name in positions:
+                        positions[counter_name][1]+=all_count[database_object]
+                    else:
+                        aggregated.append([counter_name,all_count[database_object]])
+            for counter_name, count in aggregated:
+                rows.append("{}::{}::{}::{}\n".format(database_object,counter_name,count,date_to_insert))
+        with open(aggregated_file,'w') as outfile:
+            outfile.writelines(rows)
+        logging.info("Updated the count in file {}".format(aggregated_file))
 
 class User_Display:
 
@@ -765,17 +1113,29 @@ class User_Display:
         total_count=sum(Decimal(i) for i in raw_list_int)
         return total_count
     
-    def convert_csv(self,file):
-        csv_file=file+".csv"
-        with open(file, 'r') as in_file:
-            stripped = (line.strip() for line in in_file)
-            lines = (line.split("::") for line in stripped if line)
-            with open(csv_file, 'w') as out_file:
-                writer = csv.writer(out_file)
-                #writer.writerow(('TableName', 'CounterName'))
-                writer.writerows(lines)
-        #print(csv_file)
-        return csv_file
+    def convert_csv(self,file,csv_file,header,count_row=None):
+        ''' Stream the report file into a CSV file with its header, returns the number of rows '''
+        rows=0
+        with open(file, 'r') as in_file, open(csv_file, 'w') as out_file:
+            writer = csv.writer(out_file)
+            writer.writerow(header.split("::"))
+            for line in in_file:
+                line=line.strip()
+                if not line:
+                    continue
+                fields=line.split("::")
+                writer.writerow(fields)
+                if count_row:
+                    count_row(fields)
+                rows+=1
+        return rows
+
+    def count_feature(self,fields):
+        ''' Count the counter as accessed or unaccessed for every feature of its table '''
+        unaccessed=1 if fields[2:4] == ['0','NA'] else 0
+        if len(fields) > 4:
+            for feature in fields[4].split('|'):
+                self.feature_counts.setdefault(feature.strip(),[0,0])[unaccessed]+=1
 
     def print_summary_table(self,total_uniq_count,total_unaccessed_counter,total_uniq_accessed):
                
@@ -794,45 +1154,29 @@ class User_Display:
             else:
               print('{:<80s}{:>10d}'.format(data[i][0],data[i][1]))
 
-    def feature_wise_table(self, aggregated_counters_csv): 
+    def feature_wise_table(self):
         print ("\n")
         print ("------------------------------------------------------------------------------------------------------------ ")
         print (" Feature_Name                                       Accessed_Counters                 Unaccessed_Counters ")
         print ("------------------------------------------------------------------------------------------------------------ ")
         for r in open(feature_wise_summary_file.strip()).readlines():
             feature= r.strip()
-            unaccessed_counters=str(subprocess.check_output('''cat %s | grep "%s" |grep -w "0,NA" | wc -l'''%(aggregated_counters_csv,feature), shell= True).strip())
-            accessed_counters=str(subprocess.check_output('''cat %s | grep "%s" |grep -v "0,NA" | wc -l'''%(aggregated_counters_csv,feature), shell= True).strip())
-            data = [feature,accessed_counters,unaccessed_counters]
+            accessed_counters, unaccessed_counters=self.feature_counts.get(feature,[0,0])
+            data = [feature,str(accessed_counters),str(unaccessed_counters)]
             print('{:<50s}{:>10s}{:>40s}'.format(data[0],data[1],data[2]))
-			
-    def user_display(self):
 
-        #aggregate values
-        obj_cntr=[]
-        for r in open(aggregated_counters.strip()).readlines():
-            file_obj_cntr=r.strip('\n').split('::')
-            obj_cntr.append(file_obj_cntr)
-
-        total_unaccessed_counter = sum(1 for line in open(unused_counter_list_file))
-        total_uniq_count=len(obj_cntr)
-        total_uniq_accessed=len(obj_cntr) - total_unaccessed_counter
-
-        
-        # add header
-        with open(aggregated_counters, "r+") as f: s = f.read(); f.seek(0); f.write("# Table_Name::Counter_Name::Total Access_Count::Last_Access_Date::Feature_Name #\n" + s)
-        with open(counter_data_per_date, "r+") as f: s = f.read(); f.seek(0); f.write("# Table_Name::Counter_Name::Access_Count::Access_Date::Feature_Name #\n" + s)
-        with open(unused_counter_list_file, "r+") as f: s = f.read(); f.seek(0); f.write("# Table_Name::Counter_Name::Access_Count::Access_Date::Feature_Name #\n" + s)
-        
-        # Convert to CSV
-        unused_counter_list_file_csv=self.convert_csv(unused_counter_list_file)
-        aggregated_counters_csv=self.convert_csv(aggregated_counters)
-        counter_data_per_date_csv=self.convert_csv(counter_data_per_date)
+    def user_display(self):
 
+        # Convert to CSV, counting the counters of each feature while the aggregated values are read
+        self.feature_counts={}
+        total_uniq_count=self.convert_csv(aggregated_counters,aggregated_counters_csv,"# Table_Name::Counter_Name::Total Access_Count::Last_Access_Date::Feature_Name #",self.count_feature)
+        self.convert_csv(counter_data_per_date,counter_data_per_date_csv,"# Table_Name::Counter_Name::Access_Count::Access_Date::Feature_Name #")
+        total_unaccessed_counter=self.convert_csv(unused_counter_list_file,unused_counter_list_file_csv,"# Table_Name::Counter_Name::Access_Count::Access_Date::Feature_Name #")
+        total_uniq_accessed=total_uniq_count - total_unaccessed_counter
 
         #print summary and add this to logfile
         self.print_summary_table(total_uniq_count,total_unaccessed_counter,total_uniq_accessed)
-        self.feature_wise_table(aggregated_counters_csv)
+        self.feature_wise_table()
         report_path = "\33[32m{}\033[0m".format("\n--------- "+timeStr+": Report Details :---------\n"+'Aggregated access count across the selected Time Range:'+aggregated_counters_csv+'\nDaywise statistics across the selected Time Range:'+counter_data_per_date_csv+'\nUnaccessed counter data across the selected Time Range:'+unused_counter_list_file_csv+'\nSummary Report:'+sys.argv[2]+'\n')
         logging.info(report_path)
         print report_path
@@ -841,6 +1185,19 @@ class User_Display:
 
 
                         
+def batch_files(batch_no):
+    ''' Temporary files used while parsing one batch of select queries '''
+    suffix="_"+str(batch_no)
+    return [temp_work_dir+"/Parse_Level2.log"+suffix,
+            temp_work_dir+"/temporary_failed_parsed_queries.txt"+suffix,
+            temp_work_dir+"/query_breakdown.txt"+suffix,
+            temp_work_dir+"/metadata_file.txt"+suffix,
+            temp_work_dir+"/not_parsed_metadata.txt"+suffix]
+
+def parse_level_2_batch(batch_no, queries):
+    ''' Entry point of the parsing level 2 pool workers '''
+    return Parsing_Level_2().parse_batch(batch_no, queries)
+
 def exit_gracefully(signum, frame):
     """
         restore the original signal handler as otherwise evil things will happen
@@ -875,13 +1232,7 @@ if __name__== "__main__":
         else:
             outputfile=parsed_output_file+'_0'
 
-        #create temp folders 
-        temp_folder='/eniq/backup/counter_parse_tmp/'
         flag_file=sys.argv[1]+"/.first_occurance_instance_one"
-        #if not os.path.exists('/var/tmp/parse_tmp/'):
-            #os.mkdir('/var/tmp/parse_tmp/')
-        if not os.path.exists(temp_folder):
-            os.mkdir(temp_folder)
 
         # saving parse file name in temp file
         parse_1=Parsing_Level_1()
@@ -890,15 +1241,15 @@ if __name__== "__main__":
         parsing_level_1_output.write(outputfile)
         parsing_level_1_output.close()
 
-        # Cleanup
-        if os.path.exists(temp_folder):
-            shutil.rmtree(temp_folder)
-
     elif parsing_level_type == "parsing_level_2":
         '''Parsing Level 2'''
+        output_file_path=sys.argv[1]
         input_file=sys.argv[4]
-        temp_output_file_location=sys.argv[1]
         temp_work_dir=sys.argv[5]
+        no_of_threads=int(sys.argv[6]) if len(sys.argv) > 6 else 5
+        no_of_rows_per_file=int(sys.argv[7]) if len(sys.argv) > 7 else 500
+        # Optional pause in seconds after each query to limit the load on the server
+        query_throttle=float(sys.argv[8]) if len(sys.argv) > 8 else 0
 
         # Directories required for parsing level 2
         counter_tool_parent_dir="/eniq/log/sw_log/iq/CounterTool"
@@ -907,78 +1258,43 @@ if __name__== "__main__":
 
         # Files required for parsing level 2
         timeStr=time.strftime("%d-%m-%Y_%H:%M:%S")
-        parsed_output_file=temp_output_file_location+"/Parse_Level2.log_"+timeStr
-        temp_parsed_output_file=temp_work_dir+"/temporary_parsed_output_file.log_"+timeStr
-        temp_failed_metadata_file=temp_work_dir+"/temporary_failed_parsed_queries.txt_"+timeStr
         query_breakdown_metadata=counter_tool_work_dir+"/query_breakdown.txt"
-        temp_query_breakdown_metadata=temp_work_dir+"/query_breakdown.txt_"+timeStr
-        parsed_metadata_file=temp_work_dir+"/metadata_file.txt_"+timeStr
         failed_metadata_file=counter_tool_failed_dir+"/failed_parsed_queries.txt"
-        not_parsed_queries=temp_work_dir+"/not_parsed_metadata.txt_"+timeStr
         counter_names_file=temp_work_dir+"/all_counters.txt" #all_counters_from_master_file_path
         all_columns_names_file=temp_work_dir+"/all_columns.txt" #all_columns_from_repdb
         master_file=temp_work_dir+"/master_file_for_counters_info_final.txt" #master_file
         tables_to_be_included=counter_tool_parent_dir+"/tables_to_be_considered.txt"
-        parallel_threads=sys.argv[6]
-        runtime_file=parallel_threads+"/parallel_thread_"+timeStr
-
-        if os.path.exists(parallel_threads):
-            os.system('touch {}'.format(runtime_file))
-            if os.path.exists(runtime_file):
-                os.system('cat {}'.format(runtime_file))
 
         # Start parsing
         parse_2=Parsing_Level_2()
-
-        if os.path.exists(query_breakdown_metadata):
-            copy2(query_breakdown_metadata,temp_query_breakdown_metadata)
-            os.remove(query_breakdown_metadata)
-
-        # Check for not parsed/failed queries from last run
-        query_count=parse_2.check_metadata_file()
-
-        # Collect select queries from parsing level 1 output file for further breakdown
-        parse_2.fetch_select_query(query_count)
-        try:
-            parse_2.parse_tables_counters()
-        except:
-            parse_2.update_metadata_file()
-            #os.remove(query_breakdown_metadata)
-            copy2(not_parsed_queries,query_breakdown_metadata)
-            os.remove(runtime_file)
-            for files in [not_parsed_queries,parsed_metadata_file]:
-                if os.path.exists(files):
-                    os.remove(files)
-            logging.error("Issue encountered while parsing the table and counter details. Remaining select queries will be parsed in next run")
-            exit(1)
-
-        # Queries containing columns names which are not specified in master file are found
-        if failed_queries == 1:
-            # Take backup of input and output file in case of failure
-            if os.path.exists(temp_failed_metadata_file):
-                with open(temp_failed_metadata_file,'r') as temp_failed_queries_file, open(failed_metadata_file,'a') as failed_queries_file:
-                    failes_queries_list=temp_failed_queries_file.read().splitlines()
-                    for failed_queries_line in failes_queries_list:
-                        failed_queries_file.write(failed_queries_line+"\n")
-
-            copy2(input_file,counter_tool_failed_dir)
-
-            logging.error("Failed to parse few queries. Please find the failed queries in {}\n".format(failed_metadata_file))
-
-        # Exit the code due to errors detected
-        if failed_queries == 1:
-            for files in [not_parsed_queries,parsed_metadata_file]:
-                if os.path.exists(files):
-                    os.remove(files)
-            os.remove(runtime_file)
-            exit(1)
-
-        # Normal scenario
-        for files in [not_parsed_queries,parsed_metadata_file]:
-            if os.path.exists(files):
-                os.remove(files)
-        logging.info("Parsing Level 2 completed successfully for this thread")
-        os.remove(runtime_file)
+        parse_2.parse_level_2()
+
+    elif parsing_level_type == "parsing_level_3":
+        '''Parsing Level 3'''
+        aggregated_file=sys.argv[1]
+        parsed_files_dir=sys.argv[4]
+        date_to_find=sys.argv[5]
+        master_file=sys.argv[6]
+
+        parse_3=Parsing_Level_3()
+        parse_3.aggregate()
+
+    elif parsing_level_type == "feature_mapping":
+        '''Feature mapping'''
+        work_dir=sys.argv[5]
+        feature_index=Feature_Index(work_dir+"/Techpack_table_mapping.txt",
+                                    work_dir+"/Interface_and_Techpacks.txt",
+                                    "/eniq/sw/conf/feature_techpacks",
+                                    "/eniq/sw/conf/feature_descriptions",
+                                    work_dir+"/feature_mapping_index")
+        # Lines of tables without a feature are kept as they are unless a replacement is given
+        missing_feature=sys.argv[6] if len(sys.argv) > 6 else None
+        feature_index.map_features(sys.argv[1],sys.argv[4],missing_feature)
+
+    elif parsing_level_type == "master_index":
+        '''Master file index'''
+        # Rebuilds the cached index when the master file has changed
+        Master_Index(sys.argv[1])
 
     elif parsing_level_type == "user_display":
         '''User Display'''
@@ -988,24 +1304,18 @@ if __name__== "__main__":
         if not os.path.exists(statistics_path):
             os.mkdir(statistics_path)
 
-        #Files for the reports
-        unused_counter_list_file=statistics_path+timeStr+"_unused_counter_list_file"
-        aggregated_counters=statistics_path+timeStr+"_aggregated_counters"
-        counter_data_per_date=statistics_path+timeStr+"_counter_data_per_date"
-        feature_wise_summary_file=statistics_path+timeStr+"_feature_wise_summary_file" 
- 
-        copy2(sys.argv[5],unused_counter_list_file)
-        copy2(sys.argv[4],counter_data_per_date)
-        copy2(sys.argv[1],aggregated_counters)
-        copy2(sys.argv[6],feature_wise_summary_file)
+        #Input files
+        aggregated_counters=sys.argv[1]
+        counter_data_per_date=sys.argv[4]
+        unused_counter_list_file=sys.argv[5]
+        feature_wise_summary_file=sys.argv[6]
 
+        #Files for the reports
+        unused_counter_list_file_csv=statistics_path+timeStr+"_unused_counter_list_file.csv"
+        aggregated_counters_csv=statistics_path+timeStr+"_aggregated_counters.csv"
+        counter_data_per_date_csv=statistics_path+timeStr+"_counter_data_per_date.csv"
 
         user_disp=User_Display()
         user_disp.user_display()
-        
-        #cleanup
-        for files in [unused_counter_list_file,counter_data_per_date,aggregated_counters,feature_wise_summary_file]:
-            if os.path.exists(files):
-                os.remove(files)
 
 exit(0)